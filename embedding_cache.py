@@ -0,0 +1,125 @@
+"""
+Persistent embedding cache
+
+Stores embedding vectors in SQLite keyed by SHA-256(model + text), so
+rebuilding an agent after an upload or restart only embeds text it has
+never seen before:
+  - get_many(): one SELECT for a whole batch of texts
+  - put_many(): one executemany INSERT for the misses
+  - CachedEmbeddings: drop-in wrapper for a LangChain embeddings object
+"""
+import hashlib
+import math
+import sqlite3
+import struct
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+try:
+    # Lets vector stores that type-check their embedding function accept the wrapper
+    from langchain_core.embeddings import Embeddings
+except ImportError:
+    Embeddings = object
+
+
+def _pack(vec) -> bytes:
+    """Embedding as little-endian float16, half the size of float32 and ample for similarity"""
+    return struct.pack(f"<{len(vec)}e", *vec)
+
+
+def _unpack(blob: bytes) -> List[float]:
+    return list(struct.unpack(f"<{len(blob) // 2}e", blob))
+
+
+def _unit(vec) -> List[float]:
+    norm = math.sqrt(math.fsum(x * x for x in vec))
+    return [x / norm for x in vec] if norm else list(vec)
+
+
+class EmbeddingCache:
+    """SQLite-backed map from (model, text) to a float16 embedding"""
+
+    def __init__(self, path: str, model: str):
+        self.model = model
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS emb_f16 (key BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+        self._conn.commit()
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached embedding for each text, None where it has not been stored"""
+        keys = [self._key(t) for t in texts]
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM emb_f16 WHERE key IN ({','.join('?' * len(batch))})", batch
+                )
+                found.update(rows)
+        result = []
+        for key in keys:
+            blob = found.get(key)
+            result.append(_unpack(blob) if blob is not None else None)
+        return result
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Store one embedding per text"""
+        rows = [(self._key(t), _pack(v)) for t, v in zip(texts, vectors)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO emb_f16 (key, vec) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the wrapped embedder.
+
+    With normalize=True every returned vector has unit length, so an
+    inner-product index ranks exactly like cosine similarity. The on-disk
+    cache always keeps the raw vectors.
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache, query_cache_size: int = 1024,
+                 normalize: bool = False):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.normalize = normalize
+        # Repeated queries are answered from memory instead of another Ollama call
+        self._embed_query = lru_cache(maxsize=query_cache_size)(self._embed_query_uncached)
+
+    def _finish(self, vectors):
+        return [_unit(v) for v in vectors] if self.normalize else vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vec in zip(missing, fresh):
+                vectors[i] = vec
+            self.cache.put_many([texts[i] for i in missing], fresh)
+        return self._finish(vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = await self.embeddings.aembed_documents([texts[i] for i in missing])
+            for i, vec in zip(missing, fresh):
+                vectors[i] = vec
+            self.cache.put_many([texts[i] for i in missing], fresh)
+        return self._finish(vectors)
+
+    def _embed_query_uncached(self, text: str) -> List[float]:
+        vec = self.embeddings.embed_query(text)
+        return _unit(vec) if self.normalize else vec
+
+    def embed_query(self, text: str) -> List[float]:
+        # Copy so callers can't mutate the cached vector
+        return list(self._embed_query(text))
@@ -9,7 +9,9 @@ Features:
   - Configuration management via environment variables
 """
 import os
+import re
 import time
+import asyncio
 import logging
 from typing import List, Dict, Any, Callable
 from dataclasses import dataclass, field
@@ -26,6 +28,9 @@ except ImportError as e:
         def run(self, query):
             return f"Mock response to: {query}"
 
+# Whitespace-delimited tokens, matching str.split()
+_TOKEN_SPAN_RE = re.compile(r"\S+")
+
 # Configure basic logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
@@ -57,16 +62,22 @@ class DocumentProcessor:
     overlap: int = Config.CHUNK_OVERLAP
 
     @timeit
-    def process_document(self, text: str) -> List[str]:
-        """Return list of text chunks with specified overlap"""
+    def process_document(self, text: str, doc_name: str = "") -> List[str]:
+        """Return list of text chunks with specified overlap, each tagged with doc_name if given"""
         if not text:
             return []
-        tokens = text.split()
+        # Token boundaries once; each chunk is then a single slice of text
+        starts: List[int] = []
+        ends: List[int] = []
+        for match in _TOKEN_SPAN_RE.finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        n = len(starts)
         chunks: List[str] = []
         step = self.chunk_size - self.overlap
-        for i in range(0, max(len(tokens) - self.overlap, 0), step):
-            chunk = tokens[i : i + self.chunk_size]
-            chunks.append(" ".join(chunk))
+        prefix = f"[{doc_name}] " if doc_name else ""
+        for i in range(0, max(n - self.overlap, 0), step):
+            chunks.append(prefix + text[starts[i] : ends[min(i + self.chunk_size, n) - 1]])
         return chunks
 
 
@@ -107,6 +118,15 @@ class AgentManager:
             raise ValueError("No agent available to handle the query")
         return agent.run(query)
 
+    async def arun(self, query: str) -> str:
+        """Async variant of run(); agents without arun() run in a worker thread"""
+        agent = self.route_query(query)
+        if not agent:
+            raise ValueError("No agent available to handle the query")
+        if hasattr(agent, 'arun'):
+            return await agent.arun(query)
+        return await asyncio.to_thread(agent.run, query)
+
 
 class ImprovedRAGAgent:
     """Enhanced agent combining document processing, context, and routing"""
@@ -126,10 +146,11 @@ class ImprovedRAGAgent:
                 'knowledge_base': "Service temporarily unavailable"
             })()
         self.manager = AgentManager(agents={'default': default_agent})
+        self.knowledge_base_size = len(getattr(default_agent, 'knowledge_base', '') or '')
 
-    def ingest_document(self, text: str) -> None:
+    def ingest_document(self, text: str, doc_name: str = "") -> None:
         """Process and store document chunks (stub for embedding)"""
-        chunks = self.processor.process_document(text)
+        chunks = self.processor.process_document(text, doc_name)
         # TODO: integrate embedding/storage pipeline
         logging.info(f"Ingested document into {len(chunks)} chunks")
 
@@ -145,6 +166,11 @@ class ImprovedRAGAgent:
         """Legacy API compatibility: simple run interface"""
         return self.chat(user_input, [])
 
+    async def arun(self, user_input: str) -> str:
+        """Async variant of run() for async web views"""
+        _ = self.context_mgr.manage_context([user_input])
+        return await self.manager.arun(user_input)
+
 
 if __name__ == '__main__':
     # Check if we should run in web mode
@@ -0,0 +1,33 @@
+"""
+Shared asyncio event loop
+
+The async Ollama clients (httpx underneath) keep pooled connections bound to
+the event loop they were first used on, and the clients are shared: one per
+cached OllamaLLM and one per agent's embeddings. Starting a fresh loop per
+call with asyncio.run() strands those connections on a closed loop, so sync
+code runs its coroutines here instead:
+  - run(): execute a coroutine on one long-lived loop thread per process
+"""
+import asyncio
+import os
+import threading
+
+_lock = threading.Lock()
+_loop = None
+_loop_pid = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """The process's loop, started on first use (again in a forked worker, whose copy has no thread)"""
+    global _loop, _loop_pid
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="asyncio-loop", daemon=True).start()
+        return _loop
+
+
+def run(coro):
+    """Run coro on the shared loop and block the calling thread until it returns"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
@@ -0,0 +1,13 @@
+# gunicorn.conf.py - production server for the Advanced RAG interface
+# Usage: gunicorn app:app
+import os
+
+bind = f"127.0.0.1:{os.getenv('ADVANCED_PORT', '8090')}"
+workers = int(os.getenv("WEB_WORKERS", "1"))
+threads = int(os.getenv("WEB_THREADS", "8"))
+timeout = int(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+
+# Import app.py (and build the agent + knowledge base) once in the master;
+# forked workers then share those pages copy-on-write instead of each
+# loading the documents again
+preload_app = True
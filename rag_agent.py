@@ -1,8 +1,214 @@
-from langchain_ollama import OllamaLLM
+from langchain_ollama import OllamaLLM, OllamaEmbeddings
 import os
 import re
+import asyncio
 import errno
+import heapq
+import pickle
+import tempfile
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 import PyPDF2
+from semantic_cache import SmartRAGCache
+
+try:
+    import pypdfium2  # C-backed PDFium text extraction, much faster than PyPDF2
+except ImportError:
+    pypdfium2 = None
+
+try:
+    # Optional JIT for the knowledge base scoring loop
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Canned replies for greetings and other trivial input, keyed by _small_talk_key();
+# these are answered without a knowledge base search or a model call
+_TRIVIAL = {
+    "": "I didn't catch a question there. What would you like to know?",
+    "hi": "Hello! How can I help you today?",
+    "hello": "Hi there! How can I help you today?",
+    "hey": "Hey! What would you like to know?",
+    "good morning": "Good morning! How can I help you today?",
+    "good afternoon": "Good afternoon! How can I help you today?",
+    "good evening": "Good evening! How can I help you today?",
+    "thanks": "You're welcome.",
+    "thank you": "You're welcome.",
+    "bye": "Goodbye! It was nice chatting with you.",
+    "goodbye": "Goodbye! It was nice chatting with you.",
+    "ok": "Is there anything else I can help with?",
+    "okay": "Is there anything else I can help with?",
+    "what's your name": "I'm your AI assistant, here to answer questions about the knowledge base.",
+    "what is your name": "I'm your AI assistant, here to answer questions about the knowledge base.",
+    "who are you": "I'm your AI assistant, here to answer questions about the knowledge base.",
+}
+_EDGE_PUNCT_RE = re.compile(r"^\W+|\W+$")
+_TOKEN_RE = re.compile(r"\w+")
+# Markdown emphasis/code marks dropped and newlines turned into pauses, in one pass
+_VOICE_TABLE = str.maketrans({'*': None, '`': None, '\n': '. '})
+
+def _small_talk_key(text):
+    """Lowercased text without surrounding punctuation or extra spaces ("Hello!!" -> "hello")"""
+    return " ".join(_EDGE_PUNCT_RE.sub("", text).lower().split())
+
+def _line_starts(text):
+    """Start offset of every line in text, plus a sentinel one past the end"""
+    starts = array('q', [0])
+    pos = text.find('\n')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = text.find('\n', pos + 1)
+    starts.append(len(text) + 1)
+    return starts
+
+# Extracted PDF text, keyed by file name and checked against size + mtime
+KB_CACHE_PATH = os.getenv("KB_CACHE_PATH", ".kb_cache.pkl")
+
+if njit is not None:
+    @njit(cache=True)
+    def _accumulate_scores(query_tok_ids, indptr, indices, n_lines):
+        """Per-line count of query tokens, walking the CSR posting lists"""
+        scores = np.zeros(n_lines, np.int32)
+        for t in query_tok_ids:
+            for j in range(indptr[t], indptr[t + 1]):
+                scores[indices[j]] += 1
+        return scores
+
+# Processes used to parse uncached PDFs while loading the knowledge base
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+
+def extract_pdf_text(pdf_path):
+    """Extract text from a PDF file (module level so a process pool can pickle it)"""
+    try:
+        if pypdfium2 is not None:
+            pdf = pypdfium2.PdfDocument(pdf_path)
+            try:
+                pages = []
+                for page in pdf:
+                    textpage = page.get_textpage()
+                    pages.append(textpage.get_text_range() + "\n")
+                    textpage.close()
+                    page.close()
+                return "".join(pages)
+            finally:
+                pdf.close()
+        
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            return "".join(page.extract_text() + "\n" for page in pdf_reader.pages)
+    except Exception as e:
+        print(f"Error extracting text from {pdf_path}: {e}")
+        return ""
+
+# Threads used to read text files concurrently (blocking reads release the GIL)
+READ_WORKERS = 16
+
+def _read_text(path):
+    """File contents, or the exception raised while reading it"""
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except Exception as e:
+        return e
+
+@lru_cache(maxsize=16)
+def _get_llm(model, temperature, num_ctx, top_p=0.9, repeat_penalty=1.1):
+    """Shared OllamaLLM per parameter set, so its HTTP client and connections are reused"""
+    return OllamaLLM(
+        model=model,
+        temperature=temperature,
+        top_p=top_p,
+        repeat_penalty=repeat_penalty,
+        num_ctx=num_ctx
+    )
+
+# Advanced-mode prompt templates per strategy, filled in with str.format_map()
+_ADVANCED_PROMPTS = {
+    "enhanced": """You are an advanced AI assistant with enhanced contextual understanding. You have access to a comprehensive knowledge base and should provide detailed, nuanced responses.
+
+KNOWLEDGE BASE CONTEXT:
+{context}
+
+USER QUERY: {user_input}
+
+ENHANCED INSTRUCTIONS:
+- Analyze the query for implicit requirements and context
+- Use multi-layered reasoning to connect information across different sources
+- Provide comprehensive answers with supporting evidence
+- Consider alternative interpretations and edge cases
+- Structure your response with clear reasoning chains
+- When relevant, explain the methodology behind your conclusions
+- Identify any limitations or assumptions in your response
+
+Please provide a thorough, well-reasoned response:""",
+
+    "analytical": """You are a specialized analytical AI assistant focused on systematic analysis and structured reasoning. Break down complex problems methodically.
+
+KNOWLEDGE BASE CONTEXT:
+{context}
+
+ANALYTICAL QUERY: {user_input}
+
+ANALYTICAL FRAMEWORK:
+1. PROBLEM DECOMPOSITION:
+   - Identify key components and relationships
+   - Determine relevant variables and constraints
+   - Map dependencies and causal relationships
+
+2. EVIDENCE ANALYSIS:
+   - Evaluate source credibility and relevance
+   - Identify patterns, trends, and anomalies
+   - Cross-reference multiple data points
+
+3. SYSTEMATIC REASONING:
+   - Apply logical frameworks and methodologies
+   - Consider multiple perspectives and scenarios
+   - Validate conclusions against available evidence
+
+4. SYNTHESIS AND RECOMMENDATIONS:
+   - Integrate findings into coherent insights
+   - Propose actionable recommendations
+   - Identify areas requiring further investigation
+
+Provide your analytical response following this structured approach:""",
+
+    "creative": """You are a creative and innovative AI assistant that thinks beyond conventional boundaries. Use imaginative approaches while maintaining accuracy.
+
+KNOWLEDGE BASE CONTEXT:
+{context}
+
+CREATIVE CHALLENGE: {user_input}
+
+CREATIVE INSTRUCTIONS:
+- Explore unconventional angles and perspectives
+- Generate novel connections between seemingly unrelated concepts
+- Use analogies, metaphors, and creative explanations
+- Propose innovative solutions or approaches
+- Think outside traditional frameworks while remaining grounded in facts
+- Encourage exploration of possibilities and "what-if" scenarios
+- Balance creativity with practical applicability
+
+Let your creativity flow while providing valuable insights:""",
+
+    "simple": """You are an intelligent AI assistant with access to a knowledge base. Please provide helpful, accurate, and detailed responses.
+
+CONTEXT FROM KNOWLEDGE BASE:
+{context}
+
+USER QUESTION: {user_input}
+
+INSTRUCTIONS:
+- Use the provided context when relevant to answer the question
+- If the context doesn't contain relevant information, use your general knowledge
+- Be comprehensive but concise
+- Provide specific details when available
+- If you're unsure about something, say so rather than guessing
+
+RESPONSE:""",
+}
 
 class SimpleRAGAgent:
     def __init__(self, fast_mode=False):
@@ -10,66 +216,117 @@ class SimpleRAGAgent:
         # Use lighter model for faster responses if requested
         model = "llama3.2:1b" if fast_mode else "mistral:7b"
         
-        self.llm = OllamaLLM(
-            model=model,
+        self.llm = _get_llm(
+            model,
             temperature=0.3,
-            top_p=0.9,
-            repeat_penalty=1.1,
             num_ctx=8192 if fast_mode else 16384  # Smaller context for speed
         )
         self.fast_mode = fast_mode
+        self._embeddings = None  # created on first embed() call
+        # Answers for repeated or near-identical questions, per model and mode
+        self.response_cache = SmartRAGCache(max_entries=512, ttl=300)
         self.knowledge_base = self.load_knowledge_base()
+        self.knowledge_base_size = len(self.knowledge_base)
+        self._build_index()
         print(f"🚀 Initialized {'Fast' if fast_mode else 'Standard'} RAG Agent with {model}")
     
     def extract_pdf_text(self, pdf_path):
         """Extract text from a PDF file"""
+        return extract_pdf_text(pdf_path)
+    
+    def _extract_pdfs(self, pdf_paths):
+        """Extracted text for each path, in order; parsed in parallel processes when worthwhile"""
+        workers = min(len(pdf_paths), PDF_WORKERS)
+        if workers <= 1:
+            return [self.extract_pdf_text(path) for path in pdf_paths]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(extract_pdf_text, pdf_paths))
+    
+    @staticmethod
+    def _load_pdf_cache():
+        """{filename: ((size, mtime_ns), text)} from the last load, or {} if unreadable"""
+        try:
+            with open(KB_CACHE_PATH, 'rb') as f:
+                cache = pickle.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except Exception:
+            return {}
+    
+    @staticmethod
+    def _save_pdf_cache(cache):
+        """Atomically replace the PDF text cache"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(KB_CACHE_PATH)), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, KB_CACHE_PATH)
         except Exception as e:
-            print(f"Error extracting text from {pdf_path}: {e}")
-            return ""
+            print(f"⚠ Could not write knowledge base cache: {e}")
     
     def load_knowledge_base(self):
         """Load knowledge base from text file and doccydocs folder (including PDFs)"""
-        knowledge_content = ""
+        # Pieces are joined once at the end rather than grown with +=
+        parts = []
         
         # Load the main knowledge base text file
         if os.path.exists('knowledge_base.txt'):
             with open('knowledge_base.txt', 'r') as f:
-                knowledge_content += f.read() + "\n\n"
+                parts += [f.read(), "\n\n"]
         
         # Load documents from doccydocs folder
         if os.path.exists('doccydocs'):
             print("Loading documents from doccydocs folder...")
-            for filename in os.listdir('doccydocs'):
-                file_path = os.path.join('doccydocs', filename)
-                
-                if filename.endswith('.txt'):
+            pdf_cache = self._load_pdf_cache()
+            fresh_cache = {}
+            filenames = os.listdir('doccydocs')
+            
+            # Parse every uncached PDF up front (in parallel), then assemble in listing order
+            pdf_keys = {}
+            for filename in filenames:
+                if filename.endswith('.pdf'):
                     try:
-                        with open(file_path, 'r') as f:
-                            knowledge_content += f"=== {filename} ===\n"
-                            knowledge_content += f.read() + "\n\n"
+                        st = os.stat(os.path.join('doccydocs', filename))
+                        pdf_keys[filename] = (st.st_size, st.st_mtime_ns)
+                    except OSError as e:
+                        print(f"✗ Error processing PDF {filename}: {e}")
+            pending = [name for name, key in pdf_keys.items()
+                       if pdf_cache.get(name, (None,))[0] != key]
+            # Text files are read concurrently so their IO latency overlaps the PDF parsing
+            txt_names = [name for name in filenames if name.endswith('.txt')]
+            with ThreadPoolExecutor(max_workers=max(1, min(len(txt_names), READ_WORKERS))) as readers:
+                txt_reads = readers.map(_read_text, [os.path.join('doccydocs', name) for name in txt_names])
+                extracted = dict(zip(pending, self._extract_pdfs(
+                    [os.path.join('doccydocs', name) for name in pending])))
+                texts = dict(zip(txt_names, txt_reads))
+            
+            for filename in filenames:
+                if filename.endswith('.txt'):
+                    text = texts[filename]
+                    if isinstance(text, Exception):
+                        print(f"✗ Error reading {filename}: {text}")
+                    else:
+                        parts += [f"=== {filename} ===\n", text, "\n\n"]
                         print(f"✓ Loaded text file: {filename}")
-                    except Exception as e:
-                        print(f"✗ Error reading {filename}: {e}")
                 
-                elif filename.endswith('.pdf'):
+                elif filename in pdf_keys:
                     try:
-                        pdf_text = self.extract_pdf_text(file_path)
+                        key = pdf_keys[filename]
+                        pdf_text = extracted[filename] if filename in extracted else pdf_cache[filename][1]
+                        fresh_cache[filename] = (key, pdf_text)
                         if pdf_text.strip():
-                            knowledge_content += f"=== {filename} ===\n"
-                            knowledge_content += pdf_text + "\n\n"
+                            parts += [f"=== {filename} ===\n", pdf_text, "\n\n"]
                             print(f"✓ Loaded PDF file: {filename}")
                         else:
                             print(f"⚠ No text extracted from: {filename}")
                     except Exception as e:
                         print(f"✗ Error processing PDF {filename}: {e}")
+            
+            # Rewritten only when a PDF was added, changed or removed
+            if fresh_cache.keys() != pdf_cache.keys() or any(
+                    pdf_cache[name][0] != entry[0] for name, entry in fresh_cache.items()):
+                self._save_pdf_cache(fresh_cache)
         
+        knowledge_content = "".join(parts)
         if knowledge_content:
             print(f"📚 Total knowledge base size: {len(knowledge_content)} characters")
         else:
@@ -77,6 +334,109 @@ class SimpleRAGAgent:
             
         return knowledge_content
     
+    def _build_index(self):
+        """Lowercase the knowledge base once and build a token -> line ids posting list.
+        
+        Lines are kept as offsets into the knowledge base string and its
+        lowercased copy rather than as per-line string objects.
+        """
+        lower = self.knowledge_base.lower()
+        self._kb_lower = lower
+        self._line_starts = _line_starts(self.knowledge_base)
+        # Lowercasing can change the length of some non-ASCII text
+        self._lower_starts = (self._line_starts if len(lower) == len(self.knowledge_base)
+                              else _line_starts(lower))
+        self._n_lines = len(self._line_starts) - 1
+        postings = {}
+        for i, line in enumerate(lower.split('\n')):
+            for token in set(_TOKEN_RE.findall(line)):
+                ids = postings.get(token)
+                if ids is None:
+                    ids = postings[token] = array('i')
+                ids.append(i)
+        self._postings = postings
+        
+        if njit is not None:
+            # Same postings as flat int32 CSR arrays for the JIT scorer
+            self._token_ids = {token: t for t, token in enumerate(postings)}
+            self._indptr = np.zeros(len(postings) + 1, np.int32)
+            self._indptr[1:] = np.cumsum([len(ids) for ids in postings.values()])
+            self._indices = np.concatenate(
+                [np.frombuffer(ids, dtype=np.int32) for ids in postings.values()]
+            ) if postings else np.zeros(0, np.int32)
+    
+    def _line_has(self, i: int, text: str) -> bool:
+        """Whether lowercased line i contains text, without copying the line"""
+        starts = self._lower_starts
+        return self._kb_lower.find(text, starts[i], starts[i + 1] - 1) != -1
+    
+    def _line_range(self, first: int, stop: int) -> str:
+        """Lines first..stop-1 of the knowledge base, newline-joined"""
+        return self.knowledge_base[self._line_starts[first]:self._line_starts[stop] - 1]
+    
+    def _score_lines(self, query_lower: str, boost: int) -> list:
+        """(line id, score) pairs for the four best lines, best first"""
+        tokens = _TOKEN_RE.findall(query_lower)
+        
+        if njit is not None:
+            tok_ids = np.array([self._token_ids[t] for t in tokens if t in self._token_ids], np.int32)
+            scores = _accumulate_scores(tok_ids, self._indptr, self._indices, self._n_lines)
+            candidates = np.flatnonzero(scores)
+            # Boost score for exact phrase matches
+            for i in candidates:
+                if self._line_has(i, query_lower):
+                    scores[i] += boost
+            order = np.lexsort((candidates, -scores[candidates]))[:4]
+            return [(int(candidates[o]), int(scores[candidates[o]])) for o in order]
+        
+        # Score only lines sharing a word with the query, via the posting lists
+        scores = Counter()
+        for token in tokens:
+            scores.update(self._postings.get(token, ()))
+        
+        # Boost score for exact phrase matches
+        for i in scores:
+            if self._line_has(i, query_lower):
+                scores[i] += boost
+        
+        # Sort by score (ties keep document order)
+        return heapq.nsmallest(4, scores.items(), key=lambda item: (-item[1], item[0]))
+    
+    def embed(self, text: str):
+        """Embed text with the Ollama embedding model, or None if it is unavailable"""
+        try:
+            if self._embeddings is None:
+                self._embeddings = OllamaEmbeddings(model=os.getenv("EMBEDDING_MODEL", "nomic-embed-text"))
+            return self._embeddings.embed_query(text)
+        except Exception as e:
+            print(f"⚠ Embedding unavailable: {e}")
+            return None
+
+    def trivial_answer(self, user_input: str):
+        """Canned reply for greetings and other trivial input, or None"""
+        return _TRIVIAL.get(_small_talk_key(user_input))
+    
+    def cached_answer(self, user_input: str):
+        """Canned or exact-repeat chat answer, without embedding the input (None on a miss)"""
+        trivial = self.trivial_answer(user_input)
+        if trivial is not None:
+            return trivial
+        return self.response_cache.lookup(user_input, model=self.llm.model, mode='chat')
+    
+    def _cache_lookup(self, user_input: str, model: str, mode: str):
+        """Canned or cached answer (or None) plus the query embedding to store a fresh answer under"""
+        trivial = self.trivial_answer(user_input)
+        if trivial is not None:
+            return trivial, None
+        cached = self.response_cache.lookup(user_input, model=model, mode=mode)
+        if cached is not None:
+            return cached, None
+        # Only embed when the exact tier missed
+        embedding = self.embed(user_input)
+        if embedding is not None:
+            cached = self.response_cache.lookup(user_input, embedding, model=model, mode=mode)
+        return cached, embedding
+    
     def search_knowledge(self, query: str) -> str:
         """Enhanced text search in knowledge base"""
         if not self.knowledge_base:
@@ -85,59 +445,32 @@ class SimpleRAGAgent:
         # Convert to lowercase for case-insensitive search
         query_lower = query.lower()
         query_words = query_lower.split()
+        best = self._score_lines(query_lower, len(query_words))
         
-        # Find relevant sections with scoring
-        relevant_sections = []
-        lines = self.knowledge_base.split('\n')
-        
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            score = 0
-            
-            # Score based on word matches
-            for word in query_words:
-                if word in line_lower:
-                    score += 1
-                    
-            # Boost score for exact phrase matches
-            if query_lower in line_lower:
-                score += len(query_words)
-            
-            if score > 0:
-                # Include more context - 3 lines before and after
-                start = max(0, i-3)
-                end = min(len(lines), i+4)
-                context = '\n'.join(lines[start:end])
-                relevant_sections.append((score, context, i))
-        
-        if relevant_sections:
-            # Sort by score and return top matches
-            relevant_sections.sort(key=lambda x: x[0], reverse=True)
-            top_matches = [section[1] for section in relevant_sections[:4]]
+        if best:
+            # Include more context - 3 lines before and after
+            top_matches = [self._line_range(max(0, i-3), min(self._n_lines, i+4)) for i, _ in best]
             
-            # Deduplicate similar sections
+            # Deduplicate similar sections (each section is tokenized once)
             unique_matches = []
+            unique_words = []
             for match in top_matches:
-                is_duplicate = False
-                for existing in unique_matches:
-                    if len(set(match.split()) & set(existing.split())) > len(match.split()) * 0.7:
-                        is_duplicate = True
-                        break
-                if not is_duplicate:
+                words = match.split()
+                word_set = set(words)
+                limit = len(words) * 0.7
+                if not any(len(word_set & existing) > limit for existing in unique_words):
                     unique_matches.append(match)
+                    unique_words.append(word_set)
             
             return '\n\n---\n\n'.join(unique_matches[:3])
         else:
             return "No relevant information found in knowledge base"
     
-    def run(self, user_input: str) -> str:
-        """Process user input with RAG context"""
-        try:
-            # Search knowledge base for relevant info
-            context = self.search_knowledge(user_input)
-            
-            # Create enhanced prompt with better instructions
-            prompt = f"""You are an intelligent AI assistant with access to a knowledge base. Please provide helpful, accurate, and detailed responses.
+    def build_prompt(self, user_input: str) -> str:
+        """Search the knowledge base and build the RAG prompt for user_input"""
+        context = self.search_knowledge(user_input)
+        
+        return f"""You are an intelligent AI assistant with access to a knowledge base. Please provide helpful, accurate, and detailed responses.
 
 CONTEXT FROM KNOWLEDGE BASE:
 {context}
@@ -152,12 +485,23 @@ INSTRUCTIONS:
 - If you're unsure about something, say so rather than guessing
 
 RESPONSE:"""
+    
+    def run(self, user_input: str) -> str:
+        """Process user input with RAG context"""
+        try:
+            cached, embedding = self._cache_lookup(user_input, self.llm.model, 'chat')
+            if cached is not None:
+                return cached
+            
+            prompt = self.build_prompt(user_input)
             
             print(f"DEBUG: Sending prompt to model: {prompt[:200]}...")
             response = self.llm.invoke(prompt)
             print(f"DEBUG: Model response: {response[:200]}...")
             
-            return self.clean_for_voice(response)
+            answer = self.clean_for_voice(response)
+            self.response_cache.store(user_input, answer, embedding, model=self.llm.model, mode='chat')
+            return answer
             
         except Exception as e:
             print(f"ERROR in RAG agent: {type(e).__name__}: {e}")
@@ -165,31 +509,84 @@ RESPONSE:"""
             traceback.print_exc()
             return f"I encountered a technical error: {str(e)}. Please try again or contact support."
     
-    def run_advanced(self, user_input: str, temperature: float = 0.3, max_context: int = 16384, prompt_strategy: str = 'simple') -> str:
-        """Process user input with advanced RAG context and configurable parameters"""
+    async def arun(self, user_input: str) -> str:
+        """Async variant of run() that awaits the LLM instead of blocking the thread"""
         try:
-            # Create a new LLM instance with custom parameters
-            advanced_llm = OllamaLLM(
-                model="mistral:7b",
-                temperature=temperature,
-                top_p=0.9,
-                repeat_penalty=1.1,
-                num_ctx=max_context
-            )
+            cached, embedding = await asyncio.to_thread(self._cache_lookup, user_input, self.llm.model, 'chat')
+            if cached is not None:
+                return cached
+            
+            prompt = self.build_prompt(user_input)
+            
+            print(f"DEBUG: Sending prompt to model (async): {prompt[:200]}...")
+            response = await self.llm.ainvoke(prompt)
+            print(f"DEBUG: Model response: {response[:200]}...")
             
-            # Search knowledge base for relevant info
-            context = self.search_knowledge(user_input)
+            answer = self.clean_for_voice(response)
+            self.response_cache.store(user_input, answer, embedding, model=self.llm.model, mode='chat')
+            return answer
             
-            # Select prompt based on strategy
-            prompt = self.get_advanced_prompt(user_input, context, prompt_strategy)
+        except Exception as e:
+            print(f"ERROR in RAG agent: {type(e).__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+            return f"I encountered a technical error: {str(e)}. Please try again or contact support."
+    
+    def stream(self, user_input: str):
+        """Like run(), but yield the cleaned answer piece by piece as the model generates it"""
+        try:
+            cached, embedding = self._cache_lookup(user_input, self.llm.model, 'chat')
+            if cached is not None:
+                yield cached
+                return
+            
+            prompt = self.build_prompt(user_input)
+            print(f"DEBUG: Streaming prompt to model: {prompt[:200]}...")
+            chunks = []
+            for chunk in self._stream_cleaned(self.llm, prompt):
+                chunks.append(chunk)
+                yield chunk
+            self.response_cache.store(user_input, "".join(chunks), embedding, model=self.llm.model, mode='chat')
+        except Exception as e:
+            print(f"ERROR in RAG agent: {type(e).__name__}: {e}")
+            yield f"I encountered a technical error: {str(e)}. Please try again or contact support."
+    
+    @staticmethod
+    def _advanced_cache_mode(temperature, max_context, prompt_strategy) -> str:
+        """Cache mode for run_advanced(): answers only match under identical settings"""
+        return f"advanced:{prompt_strategy}:{float(temperature)}:{int(max_context)}"
+    
+    def _advanced_request(self, user_input: str, temperature: float, max_context: int, prompt_strategy: str):
+        """LLM configured with the advanced parameters, and the strategy prompt for user_input"""
+        # LLM with custom parameters, shared across requests using the same settings
+        advanced_llm = _get_llm("mistral:7b", temperature=float(temperature), num_ctx=int(max_context))
+        
+        # Search knowledge base for relevant info
+        context = self.search_knowledge(user_input)
+        
+        # Select prompt based on strategy
+        prompt = self.get_advanced_prompt(user_input, context, prompt_strategy)
+        
+        print(f"DEBUG: Advanced mode - Strategy: {prompt_strategy}, Temp: {temperature}, Context: {max_context}")
+        print(f"DEBUG: Sending advanced prompt to model: {prompt[:200]}...")
+        return advanced_llm, prompt
+    
+    def run_advanced(self, user_input: str, temperature: float = 0.3, max_context: int = 16384, prompt_strategy: str = 'simple') -> str:
+        """Process user input with advanced RAG context and configurable parameters"""
+        try:
+            mode = self._advanced_cache_mode(temperature, max_context, prompt_strategy)
+            cached, embedding = self._cache_lookup(user_input, "mistral:7b", mode)
+            if cached is not None:
+                return cached
             
-            print(f"DEBUG: Advanced mode - Strategy: {prompt_strategy}, Temp: {temperature}, Context: {max_context}")
-            print(f"DEBUG: Sending advanced prompt to model: {prompt[:200]}...")
+            advanced_llm, prompt = self._advanced_request(user_input, temperature, max_context, prompt_strategy)
             
             response = advanced_llm.invoke(prompt)
             print(f"DEBUG: Advanced model response: {response[:200]}...")
             
-            return self.clean_for_voice(response)
+            answer = self.clean_for_voice(response)
+            self.response_cache.store(user_input, answer, embedding, model="mistral:7b", mode=mode)
+            return answer
             
         except Exception as e:
             print(f"ERROR in advanced RAG agent: {type(e).__name__}: {e}")
@@ -203,100 +600,53 @@ RESPONSE:"""
                 )
             return f"I encountered a technical error in advanced mode: {str(e)}. Please try again or contact support."
     
+    def stream_advanced(self, user_input: str, temperature: float = 0.3, max_context: int = 16384, prompt_strategy: str = 'simple'):
+        """Streaming variant of run_advanced()"""
+        try:
+            mode = self._advanced_cache_mode(temperature, max_context, prompt_strategy)
+            cached, embedding = self._cache_lookup(user_input, "mistral:7b", mode)
+            if cached is not None:
+                yield cached
+                return
+            
+            advanced_llm, prompt = self._advanced_request(user_input, temperature, max_context, prompt_strategy)
+            chunks = []
+            for chunk in self._stream_cleaned(advanced_llm, prompt):
+                chunks.append(chunk)
+                yield chunk
+            self.response_cache.store(user_input, "".join(chunks), embedding, model="mistral:7b", mode=mode)
+        except Exception as e:
+            print(f"ERROR in advanced RAG agent: {type(e).__name__}: {e}")
+            if isinstance(e, ConnectionRefusedError) or getattr(e, 'errno', None) == errno.ECONNREFUSED:
+                yield (
+                    "I’m unable to connect to the local LLM server. "
+                    "Please ensure it’s running and accessible, then try again or contact support."
+                )
+            else:
+                yield f"I encountered a technical error in advanced mode: {str(e)}. Please try again or contact support."
+    
+    def _stream_cleaned(self, llm, prompt: str):
+        """Stream llm's answer with the same cleanup and 500 character cap as clean_for_voice()"""
+        sent = 0
+        for chunk in llm.stream(prompt):
+            chunk = chunk.translate(_VOICE_TABLE)
+            if not sent:
+                chunk = chunk.lstrip()
+            if sent + len(chunk) > 500:
+                yield chunk[:500 - sent] + "..."
+                return
+            if chunk:
+                sent += len(chunk)
+                yield chunk
+    
     def get_advanced_prompt(self, user_input: str, context: str, strategy: str) -> str:
         """Generate prompts based on different strategies from rag_improvement_prompt.md concepts"""
-        
-        if strategy == 'enhanced':
-            return f"""You are an advanced AI assistant with enhanced contextual understanding. You have access to a comprehensive knowledge base and should provide detailed, nuanced responses.
-
-KNOWLEDGE BASE CONTEXT:
-{context}
-
-USER QUERY: {user_input}
-
-ENHANCED INSTRUCTIONS:
-- Analyze the query for implicit requirements and context
-- Use multi-layered reasoning to connect information across different sources
-- Provide comprehensive answers with supporting evidence
-- Consider alternative interpretations and edge cases
-- Structure your response with clear reasoning chains
-- When relevant, explain the methodology behind your conclusions
-- Identify any limitations or assumptions in your response
-
-Please provide a thorough, well-reasoned response:"""
-
-        elif strategy == 'analytical':
-            return f"""You are a specialized analytical AI assistant focused on systematic analysis and structured reasoning. Break down complex problems methodically.
-
-KNOWLEDGE BASE CONTEXT:
-{context}
-
-ANALYTICAL QUERY: {user_input}
-
-ANALYTICAL FRAMEWORK:
-1. PROBLEM DECOMPOSITION:
-   - Identify key components and relationships
-   - Determine relevant variables and constraints
-   - Map dependencies and causal relationships
-
-2. EVIDENCE ANALYSIS:
-   - Evaluate source credibility and relevance
-   - Identify patterns, trends, and anomalies
-   - Cross-reference multiple data points
-
-3. SYSTEMATIC REASONING:
-   - Apply logical frameworks and methodologies
-   - Consider multiple perspectives and scenarios
-   - Validate conclusions against available evidence
-
-4. SYNTHESIS AND RECOMMENDATIONS:
-   - Integrate findings into coherent insights
-   - Propose actionable recommendations
-   - Identify areas requiring further investigation
-
-Provide your analytical response following this structured approach:"""
-
-        elif strategy == 'creative':
-            return f"""You are a creative and innovative AI assistant that thinks beyond conventional boundaries. Use imaginative approaches while maintaining accuracy.
-
-KNOWLEDGE BASE CONTEXT:
-{context}
-
-CREATIVE CHALLENGE: {user_input}
-
-CREATIVE INSTRUCTIONS:
-- Explore unconventional angles and perspectives
-- Generate novel connections between seemingly unrelated concepts
-- Use analogies, metaphors, and creative explanations
-- Propose innovative solutions or approaches
-- Think outside traditional frameworks while remaining grounded in facts
-- Encourage exploration of possibilities and "what-if" scenarios
-- Balance creativity with practical applicability
-
-Let your creativity flow while providing valuable insights:"""
-
-        else:  # simple strategy (default)
-            return f"""You are an intelligent AI assistant with access to a knowledge base. Please provide helpful, accurate, and detailed responses.
-
-CONTEXT FROM KNOWLEDGE BASE:
-{context}
-
-USER QUESTION: {user_input}
-
-INSTRUCTIONS:
-- Use the provided context when relevant to answer the question
-- If the context doesn't contain relevant information, use your general knowledge
-- Be comprehensive but concise
-- Provide specific details when available
-- If you're unsure about something, say so rather than guessing
-
-RESPONSE:"""
+        template = _ADVANCED_PROMPTS.get(strategy, _ADVANCED_PROMPTS['simple'])
+        return template.format_map({'context': context, 'user_input': user_input})
 
     def clean_for_voice(self, text: str) -> str:
         """Clean text for voice synthesis"""
-        text = text.replace('**', '').replace('*', '')
-        text = text.replace('```', '').replace('`', '')
-        text = text.replace('\n', '. ')
+        text = text.translate(_VOICE_TABLE)
         
         if len(text) > 500:
             text = text[:500] + "..."
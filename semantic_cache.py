@@ -0,0 +1,144 @@
+"""
+Semantic response cache
+
+Caches agent answers so repeated or near-identical questions skip
+retrieval and the LLM entirely:
+  - Exact tier: normalized query string lookup
+  - Semantic tier: cosine similarity of the query embedding against all
+    cached embeddings, done as a single matrix-vector product
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """Identity of a cached answer"""
+    normalized_query: str
+    model: str = ""
+    mode: str = ""
+
+
+@dataclass
+class CacheEntry:
+    """Cached answer plus the unit-length query embedding it was stored with"""
+    response: str
+    embedding: Optional[np.ndarray]
+    ts: float
+
+
+class SmartRAGCache:
+    """LRU + TTL cache with an exact tier and an embedding-similarity tier"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 600.0, threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Embedding matrix (N, d) and its row keys, rebuilt lazily after writes
+        self._matrix: Optional[np.ndarray] = None
+        self._row_keys: list = []
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", query.lower())).strip()
+
+    @staticmethod
+    def _unit(embedding: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+        if embedding is None:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def lookup(self, query: str, embedding: Optional[Sequence[float]] = None,
+               model: str = "", mode: str = "") -> Optional[str]:
+        """Return a cached answer for query, or None on a miss"""
+        key = CacheKey(self.normalize(query), model, mode)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry.ts <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.response
+                self._evict(key)
+
+            vec = self._unit(embedding)
+            if vec is not None:
+                hit = self._nearest(vec, model, mode, now)
+                if hit is not None:
+                    self._entries.move_to_end(hit)
+                    self.hits += 1
+                    return self._entries[hit].response
+
+            self.misses += 1
+            return None
+
+    def store(self, query: str, response: str, embedding: Optional[Sequence[float]] = None,
+              model: str = "", mode: str = "") -> None:
+        """Cache response for query, evicting the least recently used entry when full"""
+        key = CacheKey(self.normalize(query), model, mode)
+        with self._lock:
+            self._entries[key] = CacheEntry(response, self._unit(embedding), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after the knowledge base changed)"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._row_keys = []
+            self._dirty = False
+
+    def _evict(self, key: CacheKey) -> None:
+        del self._entries[key]
+        self._dirty = True
+
+    def _nearest(self, vec: np.ndarray, model: str, mode: str, now: float) -> Optional[CacheKey]:
+        """Most similar live entry for the same model/mode above the threshold"""
+        if self._dirty:
+            self._rebuild()
+        if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+            return None
+        sims = self._matrix @ vec
+        for row in np.argsort(-sims):
+            if sims[row] < self.threshold:
+                break
+            key = self._row_keys[row]
+            entry = self._entries.get(key)
+            if entry is None or key.model != model or key.mode != mode:
+                continue
+            if now - entry.ts > self.ttl:
+                continue
+            return key
+        return None
+
+    def _rebuild(self) -> None:
+        rows = [(k, e.embedding) for k, e in self._entries.items() if e.embedding is not None]
+        dims = {v.shape[0] for _, v in rows}
+        if rows and len(dims) == 1:
+            self._row_keys = [k for k, _ in rows]
+            self._matrix = np.vstack([v for _, v in rows])
+        else:
+            self._row_keys = []
+            self._matrix = None
+        self._dirty = False
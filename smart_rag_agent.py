@@ -4,25 +4,144 @@ Smart RAG Agent with Vector Database
 Uses ChromaDB for semantic search and document embeddings
 """
 import os
+import re
+import time
+import queue
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import Dict, Any
+from urllib.parse import urlsplit
+from concurrent.futures import Future, ProcessPoolExecutor
 import chromadb
-from chromadb.config import Settings
 from langchain_ollama import OllamaLLM, OllamaEmbeddings
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-import PyPDF2
+from langchain_core.documents import Document
+import event_loop
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from semantic_cache import SmartRAGCache
+
+try:
+    import pypdfium2  # C-backed PDFium text extraction, much faster than PyPDFLoader
+except ImportError:
+    pypdfium2 = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding requests kept in flight against Ollama while indexing
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Attempts per batch when Ollama answers with a 5xx, with exponential backoff
+EMBED_RETRIES = 4
+# Chroma server (e.g. http://localhost:8000); unset to use the embedded ./chroma_db
+CHROMA_SERVER_URL = os.getenv("CHROMA_SERVER_URL", "")
+CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "rag")
+# Concurrent batch inserts against a Chroma server while indexing
+CHROMA_WRITE_CONCURRENCY = int(os.getenv("CHROMA_WRITE_CONCURRENCY", "4"))
+# Vector store backend: "chromadb" or "faiss" (HNSW index saved under FAISS_INDEX_DIR)
+VECTOR_DB_TYPE = os.getenv("VECTOR_DB_TYPE", "chromadb")
+FAISS_INDEX_DIR = os.getenv("FAISS_INDEX_DIR", "./faiss_index")
+# Distance for newly created Chroma collections; embeddings are normalized for
+# them, so inner product ranks like cosine without normalizing on every
+# comparison. Existing collections (and FAISS) keep their distance and get raw
+# vectors, which their stored embeddings were built from.
+COLLECTION_METADATA = {"hnsw:space": "ip"}
+# Prompt for vector-search answers, filled in with str.format_map()
+_QA_PROMPT = """You are a helpful AI assistant. Use the following context to answer the question accurately and comprehensively.
+
+Context:
+{context}
+
+Question: {question}
+
+Instructions:
+- Answer based on the provided context
+- If the context doesn't contain enough information, say so clearly
+- Be concise but thorough
+- Use specific details from the context when available
+
+Answer:"""
+# Chunks retrieved per question
+RETRIEVAL_K = 3
+# add_document() calls that arrive while a batch is being indexed are
+# coalesced into the next one, up to this many files
+FLUSH_MAX_FILES = 128
+# Seconds get_stats() reuses the stored chunk count
+STATS_TTL = 5
+# Processes used to parse documents while indexing
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+# PDFs with more pages than this are split into page ranges parsed in parallel
+PDF_SPLIT_PAGES = 32
+
+def _extract_pages(file_path, start=0, stop=None):
+    """One Document per page in [start, stop), extracted with PDFium"""
+    pdf = pypdfium2.PdfDocument(file_path)
+    try:
+        docs = []
+        for i in range(start, len(pdf) if stop is None else stop):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            docs.append(Document(page_content=textpage.get_text_range(),
+                                 metadata={"source": file_path, "page": i}))
+            textpage.close()
+            page.close()
+        return docs
+    finally:
+        pdf.close()
+
+def _page_ranges(file_path):
+    """Page ranges to parse a large PDF in parallel, or [None] to load the file in one task"""
+    if pypdfium2 is None or not file_path.endswith('.pdf'):
+        return [None]
+    try:
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            n_pages = len(pdf)
+        finally:
+            pdf.close()
+    except Exception:
+        return [None]  # _load_pdf reports the error or falls back to PyPDFLoader
+    if n_pages <= PDF_SPLIT_PAGES or PDF_WORKERS <= 1:
+        return [None]
+    step = max(PDF_SPLIT_PAGES, -(-n_pages // PDF_WORKERS))
+    return [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+
+def _load_pdf(file_path):
+    """One Document per PDF page, extracted with PDFium; PyPDFLoader if that is unavailable or fails"""
+    if pypdfium2 is not None:
+        try:
+            return _extract_pages(file_path)
+        except Exception as e:
+            logger.warning(f"⚠️ PDFium could not read {file_path}, falling back to PyPDFLoader: {e}")
+    # Document loaders are imported on first use to keep agent startup fast
+    from langchain_community.document_loaders import PyPDFLoader
+    return PyPDFLoader(file_path).load()
+
+def _load_text(file_path):
+    from langchain_community.document_loaders import TextLoader
+    return TextLoader(file_path).load()
+
+# Document loader per supported file extension
+_LOADERS = {'.pdf': _load_pdf, '.txt': _load_text}
+
+def _load_one(task):
+    """(documents, error) for a (file path, page range or None) task (module level so a process pool can pickle it)"""
+    file_path, pages = task
+    try:
+        if pages is not None:
+            return _extract_pages(file_path, *pages), None
+        return _LOADERS[os.path.splitext(file_path)[1]](file_path), None
+    except Exception as e:
+        return [], e
+
 class SmartRAGAgent:
-    def __init__(self, fast_mode=False):
+    def __init__(self, fast_mode=False, embed_batch_size=128):
         """Initialize Smart RAG Agent with vector database"""
         self.fast_mode = fast_mode
+        # Chunks embedded per Ollama request and per Chroma insert while indexing
+        self.embed_batch_size = embed_batch_size
         model = "llama3.2:1b" if fast_mode else "mistral:7b"
         
         # Initialize LLM
@@ -34,16 +153,38 @@ class SmartRAGAgent:
             num_ctx=8192 if fast_mode else 16384
         )
         
-        # Initialize embeddings
-        self.embeddings = OllamaEmbeddings(
-            model="nomic-embed-text",  # Excellent for RAG
-            base_url="http://localhost:11434"
+        # Initialize embeddings; chunks embedded before are read back from disk
+        self.embeddings = CachedEmbeddings(
+            OllamaEmbeddings(
+                model="nomic-embed-text",  # Excellent for RAG
+                base_url="http://localhost:11434"
+            ),
+            EmbeddingCache(os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite"), "nomic-embed-text"),
+            normalize=False  # switched on by _match_collection_space() for "ip" collections
+        )
+        
+        # Answers for repeated or near-identical questions
+        self.response_cache = SmartRAGCache(max_entries=512, ttl=3600)
+        # (timestamp, chunk count) reused by get_stats() for STATS_TTL seconds
+        self._count_cache = (0.0, None)
+        
+        # Shared by the initial index build and add_document()
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            length_function=len,
         )
         
         # Initialize ChromaDB
         self.persist_directory = "./chroma_db"
         self.vectorstore = None
-        self.qa_chain = None
+        self.qa_ready = False
+        
+        # (path, Future) pairs from add_document(), indexed in batches by a
+        # flusher thread that runs only while there is work queued
+        self._write_queue = queue.Queue()
+        self._flusher_lock = threading.Lock()
+        self._flusher_thread = None
         
         logger.info(f"🚀 Initialized Smart RAG Agent with {model}")
         self.setup_vectorstore()
@@ -51,28 +192,134 @@ class SmartRAGAgent:
     def setup_vectorstore(self):
         """Setup ChromaDB vector store"""
         try:
+            if VECTOR_DB_TYPE == "faiss":
+                self.setup_faiss()
+            elif CHROMA_SERVER_URL:
+                url = urlsplit(CHROMA_SERVER_URL)
+                logger.info(f"🌐 Connecting to Chroma server at {CHROMA_SERVER_URL}...")
+                client = chromadb.HttpClient(host=url.hostname, port=url.port or 8000,
+                                             ssl=url.scheme == "https")
+                try:
+                    client.get_collection(CHROMA_COLLECTION)
+                    collection_metadata = None
+                except Exception:
+                    collection_metadata = COLLECTION_METADATA
+                self.vectorstore = Chroma(
+                    client=client,
+                    collection_name=CHROMA_COLLECTION,
+                    embedding_function=self.embeddings,
+                    collection_metadata=collection_metadata
+                )
+                self._match_collection_space()
+                if self.vectorstore._collection.count() == 0:
+                    self.load_and_index_documents()
             # Check if we have existing vectorstore
-            if os.path.exists(self.persist_directory):
+            elif os.path.exists(self.persist_directory):
                 logger.info("📚 Loading existing vector database...")
                 self.vectorstore = Chroma(
                     persist_directory=self.persist_directory,
                     embedding_function=self.embeddings
                 )
+                self._match_collection_space()
             else:
                 logger.info("🆕 Creating new vector database...")
                 self.vectorstore = Chroma(
                     persist_directory=self.persist_directory,
-                    embedding_function=self.embeddings
+                    embedding_function=self.embeddings,
+                    collection_metadata=COLLECTION_METADATA
                 )
+                self._match_collection_space()
+                self.tune_sqlite()
                 self.load_and_index_documents()
             
-            self.setup_qa_chain()
+            self.setup_qa()
             
         except Exception as e:
             logger.error(f"❌ Error setting up vectorstore: {e}")
             logger.info("📝 Falling back to basic document loading...")
             self.fallback_setup()
     
+    def _match_collection_space(self):
+        """Normalize embeddings only if the opened Chroma collection ranks by inner product"""
+        metadata = self.vectorstore._collection.metadata or {}
+        self.embeddings.normalize = metadata.get("hnsw:space") == "ip"
+        logger.info(f"📐 Collection distance: {metadata.get('hnsw:space', 'l2')}")
+    
+    def setup_faiss(self):
+        """Load the saved FAISS index, or build it from doccydocs on first start"""
+        from langchain_community.vectorstores import FAISS
+        
+        if os.path.exists(FAISS_INDEX_DIR):
+            logger.info("📚 Loading existing FAISS index...")
+            # The docstore is a pickle this agent wrote itself
+            self.vectorstore = FAISS.load_local(FAISS_INDEX_DIR, self.embeddings,
+                                                allow_dangerous_deserialization=True)
+        else:
+            logger.info("🆕 Creating new FAISS index...")
+            self.load_and_index_documents()
+            if self.vectorstore is None:
+                raise ValueError("no documents were indexed")
+    
+    def _new_faiss_store(self, dim):
+        """Empty FAISS store over an HNSW index, whose inserts stay cheap as it grows"""
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+        
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.hnsw.efConstruction = 200
+        return FAISS(embedding_function=self.embeddings, index=index,
+                     docstore=InMemoryDocstore(), index_to_docstore_id={})
+    
+    @staticmethod
+    def _load_files(paths):
+        """(documents, error) for each path, in order; parsed in parallel processes when worthwhile.
+
+        Large PDFs are split into page ranges so a single big file is also
+        spread across the pool; the ranges are stitched back in page order.
+        If PDFium fails on any range, the whole file is loaded again through
+        _load_pdf(), which falls back to PyPDFLoader.
+        """
+        tasks = [(path, pages) for path in paths for pages in _page_ranges(path)]
+        results = None
+        if min(len(tasks), PDF_WORKERS) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(len(tasks), PDF_WORKERS)) as pool:
+                    results = list(pool.map(_load_one, tasks))
+            except RuntimeError:
+                pass  # no new pools during interpreter shutdown; load in-process
+        if results is None:
+            results = [_load_one(task) for task in tasks]
+        
+        merged = {path: ([], None) for path in paths}
+        for (path, _), (docs, error) in zip(tasks, results):
+            merged_docs, merged_error = merged[path]
+            merged_docs.extend(docs)
+            merged[path] = (merged_docs, merged_error or error)
+        split = {path for path, pages in tasks if pages is not None}
+        for path, (_, error) in merged.items():
+            if error is not None and path in split:
+                logger.warning(f"⚠️ Split load of {path} failed, loading it whole: {error}")
+                merged[path] = _load_one((path, None))
+        return [merged[path] for path in paths]
+    
+    def tune_sqlite(self):
+        """Apply write-friendly pragmas to Chroma's SQLite database before bulk inserts.
+
+        journal_mode=WAL persists in the database file; the other pragmas
+        apply to this thread's pooled connection, which does the initial
+        indexing. Chroma internals move between versions, so failures are
+        only logged.
+        """
+        try:
+            from chromadb.db.impl.sqlite import SqliteDB
+            conn = self.vectorstore._client._system.instance(SqliteDB)._conn_pool.connect()
+            for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY",
+                           f"mmap_size={1 << 30}"):
+                conn.execute(f"PRAGMA {pragma}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not tune Chroma SQLite pragmas, indexing will be slower: {e}")
+    
     def load_and_index_documents(self):
         """Load and index documents from doccydocs folder"""
         if not os.path.exists('doccydocs'):
@@ -80,82 +327,128 @@ class SmartRAGAgent:
             return
         
         documents = []
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
         
         logger.info("📖 Loading documents...")
-        for filename in os.listdir('doccydocs'):
-            file_path = os.path.join('doccydocs', filename)
-            
-            try:
-                if filename.endswith('.pdf'):
-                    loader = PyPDFLoader(file_path)
-                    docs = loader.load()
-                    documents.extend(docs)
-                    logger.info(f"✅ Loaded PDF: {filename}")
-                
-                elif filename.endswith('.txt'):
-                    loader = TextLoader(file_path)
-                    docs = loader.load()
-                    documents.extend(docs)
-                    logger.info(f"✅ Loaded TXT: {filename}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error loading {filename}: {e}")
+        filenames = [name for name in os.listdir('doccydocs') if os.path.splitext(name)[1] in _LOADERS]
+        paths = [os.path.join('doccydocs', name) for name in filenames]
+        
+        for filename, (docs, error) in zip(filenames, self._load_files(paths)):
+            if error is not None:
+                logger.error(f"❌ Error loading {filename}: {error}")
+                continue
+            documents.extend(docs)
+            logger.info(f"✅ Loaded {'PDF' if filename.endswith('.pdf') else 'TXT'}: {filename}")
         
         if documents:
             logger.info(f"🔄 Splitting {len(documents)} documents into chunks...")
-            splits = text_splitter.split_documents(documents)
+            splits = self.text_splitter.split_documents(documents)
             logger.info(f"📦 Created {len(splits)} document chunks")
             
             logger.info("🔄 Creating embeddings and storing in vector database...")
-            self.vectorstore.add_documents(splits)
-            self.vectorstore.persist()
+            self.index_chunks(splits)
             logger.info("✅ Documents indexed successfully!")
         else:
             logger.warning("⚠️ No documents found to index")
     
-    def setup_qa_chain(self):
-        """Setup the QA retrieval chain"""
-        # Custom prompt template for better responses
-        template = """You are a helpful AI assistant. Use the following context to answer the question accurately and comprehensively.
-
-Context:
-{context}
-
-Question: {question}
-
-Instructions:
-- Answer based on the provided context
-- If the context doesn't contain enough information, say so clearly
-- Be concise but thorough
-- Use specific details from the context when available
-
-Answer:"""
+    async def _aembed_batches(self, batches, concurrency=EMBED_CONCURRENCY):
+        """Embeddings for each batch of texts, with up to `concurrency` Ollama requests in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def embed(texts):
+            async with semaphore:
+                for attempt in range(EMBED_RETRIES):
+                    try:
+                        return await self.embeddings.aembed_documents(texts)
+                    except Exception as e:
+                        status = getattr(e, 'status_code', None)
+                        if status is None or status < 500 or attempt == EMBED_RETRIES - 1:
+                            raise
+                        logger.warning(f"⚠️ Embedding request failed ({status}), retrying...")
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+        
+        return await asyncio.gather(*(embed(texts) for texts in batches))
+    
+    @staticmethod
+    def chunk_id(text):
+        """Content-hash id, so a chunk seen before (repeated boilerplate, a re-added file) maps to the same id"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+    
+    def _existing_ids(self, ids):
+        """The subset of ids already stored in the vector store"""
+        if self.vectorstore is None:
+            return set()
+        if VECTOR_DB_TYPE == "faiss":
+            return set(ids) & set(self.vectorstore.index_to_docstore_id.values())
+        found = set()
+        for i in range(0, len(ids), 1000):
+            found.update(self.vectorstore._collection.get(ids=ids[i:i + 1000], include=[])["ids"])
+        return found
+    
+    def index_chunks(self, splits):
+        """Embed new chunks in concurrent batches and insert them straight into the vector store.
 
-        PROMPT = PromptTemplate(
-            template=template,
-            input_variables=["context", "question"]
-        )
+        Chunks are keyed by content hash: duplicates within splits and chunks
+        already in the store are skipped before any embedding work.
+        """
+        unique = {}
+        for doc in splits:
+            unique.setdefault(self.chunk_id(doc.page_content), doc)
+        existing = self._existing_ids(list(unique))
+        new = [(chunk_id, doc) for chunk_id, doc in unique.items() if chunk_id not in existing]
+        if len(new) < len(splits):
+            logger.info(f"♻️ Skipping {len(splits) - len(new)} duplicate or already indexed chunks")
         
-        # Setup retrieval QA chain
-        retriever = self.vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 3}  # Retrieve top 3 most relevant chunks
-        )
+        for _, doc in new:
+            doc.metadata["basename"] = os.path.basename(doc.metadata.get("source", ""))
+        batches = [new[i:i + self.embed_batch_size] for i in range(0, len(new), self.embed_batch_size)]
+        batch_ids = [[chunk_id for chunk_id, _ in batch] for batch in batches]
+        batch_texts = [[doc.page_content for _, doc in batch] for batch in batches]
+        batch_metadatas = [[doc.metadata for _, doc in batch] for batch in batches]
+        # On the shared loop: the embeddings' async client pools connections per loop
+        batch_embeddings = event_loop.run(self._aembed_batches(batch_texts))
+        rows = list(zip(batch_ids, batch_texts, batch_metadatas, batch_embeddings))
+        try:
+            self._write_rows(rows)
+        finally:
+            # After the writes (even partial ones), so get_stats() can't re-cache the old count
+            self._count_cache = (0.0, None)
+    
+    def _write_rows(self, rows):
+        """Insert (ids, texts, metadatas, embeddings) batches into the configured vector store"""
+        if VECTOR_DB_TYPE == "faiss":
+            for ids, texts, metadatas, embeddings in rows:
+                if self.vectorstore is None:
+                    self.vectorstore = self._new_faiss_store(len(embeddings[0]))
+                self.vectorstore.add_embeddings(zip(texts, embeddings), metadatas=metadatas, ids=ids)
+            if rows:
+                self.vectorstore.save_local(FAISS_INDEX_DIR)
+            return
+        if CHROMA_SERVER_URL:
+            event_loop.run(self._aadd_batches(rows))
+            return
+        for ids, texts, metadatas, embeddings in rows:
+            self.vectorstore._collection.add(ids=ids, embeddings=embeddings,
+                                             documents=texts, metadatas=metadatas)
+    
+    async def _aadd_batches(self, rows):
+        """Insert (ids, texts, metadatas, embeddings) batches into the Chroma server, several requests at a time"""
+        url = urlsplit(CHROMA_SERVER_URL)
+        client = await chromadb.AsyncHttpClient(host=url.hostname, port=url.port or 8000,
+                                                ssl=url.scheme == "https")
+        collection = await client.get_collection(CHROMA_COLLECTION)
+        semaphore = asyncio.Semaphore(CHROMA_WRITE_CONCURRENCY)
         
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=retriever,
-            chain_type_kwargs={"prompt": PROMPT},
-            return_source_documents=True
-        )
+        async def add(ids, texts, metadatas, embeddings):
+            async with semaphore:
+                await collection.add(ids=ids, embeddings=embeddings,
+                                     documents=texts, metadatas=metadatas)
         
-        logger.info("🔗 QA chain setup complete")
+        await asyncio.gather(*(add(*row) for row in rows))
+    
+    def setup_qa(self):
+        """Enable vector-search answering once the vector store is ready"""
+        self.qa_ready = True
+        logger.info("🔗 Vector search ready")
     
     def fallback_setup(self):
         """Fallback to basic document loading if vector DB fails"""
@@ -174,107 +467,180 @@ Answer:"""
                 file_path = os.path.join('doccydocs', filename)
                 if filename.endswith('.pdf'):
                     try:
-                        with open(file_path, 'rb') as file:
-                            pdf_reader = PyPDF2.PdfReader(file)
-                            text = ""
-                            for page in pdf_reader.pages:
-                                text += page.extract_text() + "\n"
-                            knowledge_content += f"\n--- {filename} ---\n{text}\n"
+                        text = "".join(doc.page_content + "\n" for doc in _load_pdf(file_path))
+                        knowledge_content += f"\n--- {filename} ---\n{text}\n"
                     except Exception as e:
                         logger.error(f"Error extracting {filename}: {e}")
         
         return knowledge_content
     
+    def _search(self, embedding):
+        """(texts, metadatas) of the RETRIEVAL_K chunks nearest to a query embedding"""
+        if VECTOR_DB_TYPE == "faiss":
+            docs = self.vectorstore.similarity_search_by_vector(embedding, k=RETRIEVAL_K)
+            return [doc.page_content for doc in docs], [doc.metadata for doc in docs]
+        result = self.vectorstore._collection.query(
+            query_embeddings=[embedding],
+            n_results=RETRIEVAL_K,
+            include=["documents", "metadatas"]
+        )
+        return result["documents"][0], [meta or {} for meta in result["metadatas"][0]]
+    
     def run(self, query: str) -> str:
         """Process query using vector search or fallback"""
+        return "".join(self.stream(query))
+    
+    def stream(self, query: str):
+        """Like run(), but yield the answer piece by piece as the model generates it"""
         try:
-            if self.qa_chain:
-                logger.info("🔍 Using vector search...")
-                result = self.qa_chain.invoke({"query": query})
+            if self.qa_ready:
+                embedding = self.embeddings.embed_query(query)
+                cached = self.response_cache.lookup(query, embedding, model=self.llm.model, mode='vector')
+                if cached is not None:
+                    logger.info("⚡ Answered from response cache")
+                    yield cached
+                    return
                 
-                # Extract answer and sources
-                answer = result.get("result", "")
-                sources = result.get("source_documents", [])
+                logger.info("🔍 Using vector search...")
+                texts, metadatas = self._search(embedding)
+                prompt = _QA_PROMPT.format_map({"context": "\n\n".join(texts), "question": query})
+                chunks = []
+                for chunk in self.llm.stream(prompt):
+                    chunks.append(chunk)
+                    yield chunk
                 
-                # Add source information
-                if sources:
-                    source_info = "\n\n📚 Sources:"
-                    for i, doc in enumerate(sources[:2], 1):  # Show top 2 sources
-                        source = doc.metadata.get('source', 'Unknown')
-                        source_info += f"\n{i}. {os.path.basename(source)}"
-                    answer += source_info
+                # Add source information (basename is stored at indexing time;
+                # chunks indexed before that still carry only 'source')
+                if metadatas:
+                    source_info = "\n\n📚 Sources:\n" + "\n".join(
+                        f"{i}. {meta.get('basename') or os.path.basename(meta.get('source', 'Unknown'))}"
+                        for i, meta in enumerate(metadatas[:2], 1)  # Show top 2 sources
+                    )
+                    chunks.append(source_info)
+                    yield source_info
                 
-                return answer
+                self.response_cache.store(query, "".join(chunks), embedding, model=self.llm.model, mode='vector')
             else:
                 logger.info("📝 Using basic search...")
-                return self.basic_search(query)
+                yield self.basic_search(query)
                 
         except Exception as e:
             logger.error(f"❌ Error in query processing: {e}")
-            return f"I encountered an error processing your question: {str(e)}"
+            yield f"I encountered an error processing your question: {str(e)}"
     
     def basic_search(self, query: str) -> str:
         """Basic keyword search fallback"""
         if not hasattr(self, 'knowledge_base') or not self.knowledge_base:
             return "I don't have access to any knowledge base to answer your question."
         
-        # Simple keyword matching
+        # Simple keyword matching: the first 5 lines containing any query word.
+        # One case-insensitive regex scans the text in C and stops once 5 lines are found.
         query_words = query.lower().split()
         relevant_lines = []
         
-        for line in self.knowledge_base.split('\n'):
-            if any(word in line.lower() for word in query_words):
-                relevant_lines.append(line.strip())
+        if query_words:
+            kb = self.knowledge_base
+            pattern = re.compile("|".join(map(re.escape, query_words)), re.IGNORECASE)
+            pos = 0
+            while len(relevant_lines) < 5:
+                match = pattern.search(kb, pos)
+                if match is None:
+                    break
+                start = kb.rfind('\n', 0, match.start()) + 1
+                end = kb.find('\n', match.end())
+                if end == -1:
+                    end = len(kb)
+                relevant_lines.append(kb[start:end].strip())
+                pos = end + 1
         
         if relevant_lines:
-            context = '\n'.join(relevant_lines[:5])  # Top 5 relevant lines
+            context = '\n'.join(relevant_lines)  # Top 5 relevant lines
             prompt = f"Based on this context:\n{context}\n\nQuestion: {query}\n\nAnswer:"
             return self.llm.invoke(prompt)
         else:
             return f"I couldn't find relevant information about '{query}' in my knowledge base."
     
     def add_document(self, file_path: str):
-        """Add a new document to the vector database"""
+        """Add a new document to the vector database; True once it has been indexed.
+
+        Blocks until the file's batch is done. Documents added from other
+        threads while a batch is being indexed are loaded, embedded and
+        inserted together in the next one.
+        """
         if not self.vectorstore:
             logger.error("❌ Vector database not available")
             return False
         
-        try:
-            if file_path.endswith('.pdf'):
-                loader = PyPDFLoader(file_path)
-            elif file_path.endswith('.txt'):
-                loader = TextLoader(file_path)
-            else:
-                logger.error(f"❌ Unsupported file type: {file_path}")
-                return False
-            
-            docs = loader.load()
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
-            )
-            splits = text_splitter.split_documents(docs)
-            
-            self.vectorstore.add_documents(splits)
-            self.vectorstore.persist()
-            
-            logger.info(f"✅ Added {file_path} to vector database")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Error adding document: {e}")
+        if os.path.splitext(file_path)[1] not in _LOADERS:
+            logger.error(f"❌ Unsupported file type: {file_path}")
             return False
+        
+        done = Future()
+        with self._flusher_lock:
+            self._write_queue.put((file_path, done))
+            if self._flusher_thread is None:
+                self._flusher_thread = threading.Thread(target=self._flusher, daemon=True)
+                self._flusher_thread.start()
+        return done.result()
+    
+    def _flusher(self):
+        """Index queued files in batches until the queue is empty, then exit"""
+        while True:
+            with self._flusher_lock:
+                if self._write_queue.empty():
+                    self._flusher_thread = None
+                    return
+            # Only what is already queued is coalesced; a lone file is indexed at once
+            batch = [self._write_queue.get_nowait()]
+            while len(batch) < FLUSH_MAX_FILES:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                added = self._index_files([path for path, _ in batch])
+            except Exception as e:
+                logger.error(f"❌ Error adding documents: {e}")
+                added = set()
+            for path, done in batch:
+                done.set_result(path in added)
+    
+    def _index_files(self, paths):
+        """Load, split and index a batch of files; the set of paths that were added"""
+        splits = []
+        added = set()
+        for path, (docs, error) in zip(paths, self._load_files(paths)):
+            if error is not None:
+                logger.error(f"❌ Error adding document {path}: {error}")
+                continue
+            splits.extend(self.text_splitter.split_documents(docs))
+            added.add(path)
+        
+        if splits:
+            self.index_chunks(splits)
+            self.response_cache.clear()
+        for path in added:
+            logger.info(f"✅ Added {path} to vector database")
+        return added
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector database"""
         try:
             if self.vectorstore:
-                collection = self.vectorstore._collection
-                count = collection.count()
+                vector_db = "FAISS" if VECTOR_DB_TYPE == "faiss" else "ChromaDB"
+                ts, count = self._count_cache
+                if count is None or time.time() - ts > STATS_TTL:
+                    if VECTOR_DB_TYPE == "faiss":
+                        count = self.vectorstore.index.ntotal
+                    else:
+                        count = self.vectorstore._collection.count()
+                    self._count_cache = (time.time(), count)
                 return {
-                    "vector_db": "ChromaDB",
+                    "vector_db": vector_db,
                     "total_chunks": count,
                     "embedding_model": "nomic-embed-text",
+                    "cache_hits": self.response_cache.hits,
+                    "cache_misses": self.response_cache.misses,
                     "status": "✅ Active"
                 }
             else:
@@ -314,8 +680,10 @@ if __name__ == '__main__':
             if query.lower() in ('quit', 'exit'):
                 break
             
-            response = agent.run(query)
-            print(f"\n🤖 {response}")
+            print("\n🤖 ", end="", flush=True)
+            for chunk in agent.stream(query):
+                print(chunk, end="", flush=True)
+            print()
             
         except KeyboardInterrupt:
             break
@@ -0,0 +1,561 @@
+// Static page elements, looked up once. The script is loaded with defer,
+// so the document is fully parsed by the time this runs.
+const DOM = {};
+for (const id of [
+    'message-input', 'chat-container', 'toast', '28-files-table-body', 'kb-size', 'kb-file-count',
+    'stat-total-files', 'stat-total-size', 'stat-kb-size', '10-theme-icon', '11-theme-text', 'mode-icon',
+    'mode-text', 'chat-tab', '17-chat-status', 'available-models', 'download-status', '6-current-model',
+    '7-model-params', 'model-display', 'tech-model', '8-model-tags', 'file-input', '21-upload-area'
+]) {
+    DOM[id] = document.getElementById(id);
+}
+
+function openTab(evt, tabName) {
+    var i, tabcontent, tabs;
+    tabcontent = document.getElementsByClassName("tab-content");
+    for (i = 0; i < tabcontent.length; i++) {
+        tabcontent[i].classList.remove("active");
+    }
+    tabs = document.getElementsByClassName("tab");
+    for (i = 0; i < tabs.length; i++) {
+        tabs[i].classList.remove("active");
+    }
+    document.getElementById(tabName).classList.add("active");
+    evt.currentTarget.classList.add("active");
+}
+
+// Chat functionality
+async function sendMessage() {
+    const input = DOM['message-input'];
+    const message = input.value.trim();
+    if (!message) return;
+
+    addMessage(message, 'user');
+    input.value = '';
+
+    const thinkingId = addMessage('🤔 Agent is thinking...', 'agent');
+
+    try {
+        // Get current mode
+        const currentMode = await getMode();
+
+        // Prepare request payload
+        let requestPayload = {
+            message: message,
+            mode: currentMode
+        };
+
+        // Add advanced parameters if in advanced mode
+        if (currentMode === 'advanced') {
+            const tempSlider = document.getElementById('temp-slider');
+            const contextSlider = document.getElementById('context-slider');
+            const promptStrategy = document.getElementById('prompt-strategy');
+            const responseMode = document.getElementById('response-mode');
+
+            if (tempSlider && contextSlider && promptStrategy && responseMode) {
+                requestPayload.temperature = parseFloat(tempSlider.value);
+                requestPayload.max_context = parseInt(contextSlider.value);
+                requestPayload.prompt_strategy = promptStrategy.value;
+                requestPayload.response_mode = responseMode.value;
+            }
+        }
+
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(requestPayload)
+        });
+
+        // Append server-sent chunks to the placeholder as they arrive
+        const messageDiv = document.getElementById(thinkingId);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let started = false;
+        while (true) {
+            const {value, done} = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, {stream: true});
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            for (const event of events) {
+                if (!event.startsWith('data: ')) continue;
+                const text = JSON.parse(event.slice(6)).t;
+                messageDiv.textContent = started ? messageDiv.textContent + text : text;
+                started = true;
+            }
+            DOM['chat-container'].scrollTop = DOM['chat-container'].scrollHeight;
+        }
+        if (!started) messageDiv.textContent = 'Error: Could not get response';
+    } catch (error) {
+        document.getElementById(thinkingId).textContent = 'Error: Could not get response';
+    }
+}
+
+function addMessage(text, sender) {
+    const container = DOM['chat-container'];
+    const messageDiv = document.createElement('div');
+    const messageId = 'msg-' + Date.now();
+    messageDiv.id = messageId;
+    messageDiv.className = 'message ' + sender;
+    messageDiv.textContent = text;
+    container.appendChild(messageDiv);
+    container.scrollTop = container.scrollHeight;
+    return messageId;
+}
+
+// File upload functionality
+DOM['file-input'].addEventListener('change', uploadFiles);
+
+const uploadArea = DOM['21-upload-area'];
+uploadArea.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    uploadArea.classList.add('dragover');
+});
+
+uploadArea.addEventListener('dragleave', () => {
+    uploadArea.classList.remove('dragover');
+});
+
+uploadArea.addEventListener('drop', (e) => {
+    e.preventDefault();
+    uploadArea.classList.remove('dragover');
+    const files = e.dataTransfer.files;
+    uploadFiles({target: {files: files}});
+});
+
+async function uploadFiles(event) {
+    const files = [...event.target.files];
+    // Send every file at once, then refresh the table a single time
+    const results = await Promise.all(files.map(async file => {
+        const formData = new FormData();
+        formData.append('file', file);
+
+        try {
+            const response = await fetch('/upload', {
+                method: 'POST',
+                body: formData
+            });
+            if (!response.ok) return {text: `❌ Failed to upload ${file.name}`, job: 0};
+            const data = await response.json();
+            return {text: `✅ ${file.name} uploaded successfully!`, job: data.job};
+        } catch (error) {
+            return {text: `❌ Error uploading ${file.name}: ${error.message}`, job: 0};
+        }
+    }));
+
+    toast(results.map(r => r.text).join('\n'));
+    await refreshStats();
+    await waitForRebuild(Math.max(0, ...results.map(r => r.job)));
+}
+
+async function deleteFile(filename) {
+    if (!confirm(`Are you sure you want to delete ${filename}?`)) return;
+
+    try {
+        const response = await fetch(`/delete/${encodeURIComponent(filename)}`, {method: 'DELETE'});
+        if (response.ok) {
+            toast(`✅ ${filename} deleted successfully!`);
+            await refreshStats();
+            await waitForRebuild((await response.json()).job);
+        } else {
+            toast(`❌ Failed to delete ${filename}`);
+        }
+    } catch (error) {
+        toast(`❌ Error deleting ${filename}: ${error.message}`);
+    }
+}
+
+// Non-blocking notification in place of alert()
+let toastTimer = null;
+
+function toast(message) {
+    const el = DOM['toast'];
+    el.textContent = message;
+    el.classList.add('visible');
+    clearTimeout(toastTimer);
+    toastTimer = setTimeout(() => el.classList.remove('visible'), 3000);
+}
+
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[c]);
+}
+
+// Rebuild the files table as one HTML string and a single innerHTML write
+function renderFilesTable(files) {
+    const html = files.map(f => `<tr>` +
+        `<td>${escapeHtml(f.name)}</td>` +
+        `<td>${escapeHtml(f.type_upper)}</td>` +
+        `<td>${f.size_mb} MB</td>` +
+        `<td>${escapeHtml(f.modified)}</td>` +
+        `<td><span class="status-badge status-${f.status}">${f.status_upper}</span></td>` +
+        `<td><button class="danger" data-filename="${escapeHtml(f.name)}">🗑️ Delete</button></td>` +
+        `</tr>`).join('');
+    requestAnimationFrame(() => {
+        DOM['28-files-table-body'].innerHTML = html;
+    });
+}
+
+// One delegated listener handles every row's delete button
+DOM['28-files-table-body'].addEventListener('click', e => {
+    const btn = e.target.closest('button[data-filename]');
+    if (btn) deleteFile(btn.dataset.filename);
+});
+
+// Refresh the stat numbers and files table in place from /api/stats
+async function refreshStats() {
+    const response = await fetch('/api/stats');
+    if (!response.ok) return;
+    const stats = await response.json();
+    DOM['kb-size'].textContent = stats.knowledge_base_size;
+    DOM['kb-file-count'].textContent = stats.total_files;
+    DOM['stat-total-files'].textContent = stats.total_files;
+    DOM['stat-total-size'].textContent = `${stats.total_size_mb} MB`;
+    DOM['stat-kb-size'].textContent = stats.knowledge_base_size;
+    renderFilesTable(stats.files);
+    return stats;
+}
+
+// The server rebuilds the knowledge base in the background after uploads,
+// deletes and reloads; poll until it has caught up with job, then refresh
+async function waitForRebuild(job) {
+    if (!job) return false;
+    for (let attempt = 0; attempt < 240; attempt++) {
+        const response = await fetch('/reload/status');
+        const state = await response.json();
+        if (state.completed >= job) {
+            if (state.error) {
+                toast(`❌ Knowledge base rebuild failed: ${state.error}`);
+                return false;
+            }
+            await refreshStats();
+            return true;
+        }
+        await new Promise(resolve => setTimeout(resolve, 500));
+    }
+    return false;
+}
+
+async function reloadKnowledgeBase() {
+    try {
+        const response = await fetch('/reload', {method: 'POST'});
+        if (response.ok) {
+            toast('🔄 Reloading knowledge base...');
+            if (await waitForRebuild((await response.json()).job)) {
+                toast('✅ Knowledge base reloaded successfully!');
+            }
+        } else {
+            toast('❌ Failed to reload knowledge base');
+        }
+    } catch (error) {
+        toast(`❌ Error reloading: ${error.message}`);
+    }
+}
+
+// Theme toggle functionality
+function toggleTheme() {
+    const body = document.body;
+    const themeIcon = DOM['10-theme-icon'];
+    const themeText = DOM['11-theme-text'];
+
+    if (body.getAttribute('data-theme') === 'dark') {
+        body.removeAttribute('data-theme');
+        themeIcon.textContent = '🌙';
+        themeText.textContent = 'Dark Mode';
+        localStorage.setItem('theme', 'light');
+    } else {
+        body.setAttribute('data-theme', 'dark');
+        themeIcon.textContent = '☀️';
+        themeText.textContent = 'Light Mode';
+        localStorage.setItem('theme', 'dark');
+    }
+}
+
+// Mode switching functionality
+// Mode as last set by updateModeUI(); loadMode() syncs it to the server on load
+let knownMode = null;
+
+async function getMode() {
+    // The tab's last known mode saves a /get-mode round-trip
+    if (knownMode) return knownMode;
+    const cached = sessionStorage.getItem('rag_mode') || localStorage.getItem('mode');
+    if (cached) return (knownMode = cached);
+    const response = await fetch('/get-mode');
+    const data = await response.json();
+    sessionStorage.setItem('rag_mode', data.mode);
+    return (knownMode = data.mode);
+}
+
+function toggleMode() {
+    getMode()
+        .then(mode => {
+            const newMode = mode === 'simple' ? 'advanced' : 'simple';
+
+            fetch('/set-mode', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ mode: newMode })
+            })
+            .then(response => response.json())
+            .then(result => {
+                if (result.success) {
+                    updateModeUI(result.mode);
+                    // Show mode change notification
+                    addMessage('system', `Switched to ${result.mode.charAt(0).toUpperCase() + result.mode.slice(1)} Mode`);
+                }
+            })
+            .catch(error => {
+                console.error('Error switching mode:', error);
+                addMessage('error', 'Failed to switch mode');
+            });
+        });
+}
+
+function updateModeUI(mode) {
+    const modeIcon = DOM['mode-icon'];
+    const modeText = DOM['mode-text'];
+
+    if (mode === 'advanced') {
+        modeIcon.textContent = '🔬';
+        modeText.textContent = 'Advanced';
+        document.body.setAttribute('data-mode', 'advanced');
+
+        // Show advanced features
+        showAdvancedFeatures();
+    } else {
+        modeIcon.textContent = '🔰';
+        modeText.textContent = 'Simple';
+        document.body.setAttribute('data-mode', 'simple');
+
+        // Hide advanced features
+        hideAdvancedFeatures();
+    }
+
+    // Save mode preference
+    knownMode = mode;
+    localStorage.setItem('mode', mode);
+    sessionStorage.setItem('rag_mode', mode);
+}
+
+function showAdvancedFeatures() {
+    // Add advanced mode features to the UI
+    const advancedElements = document.querySelectorAll('.advanced-only');
+    advancedElements.forEach(el => el.style.display = 'block');
+
+    // Add advanced prompt controls to chat tab
+    addAdvancedPromptControls();
+}
+
+function hideAdvancedFeatures() {
+    // Hide advanced mode features
+    const advancedElements = document.querySelectorAll('.advanced-only');
+    advancedElements.forEach(el => el.style.display = 'none');
+
+    // Remove advanced prompt controls
+    removeAdvancedPromptControls();
+}
+
+function addAdvancedPromptControls() {
+    const chatTab = DOM['chat-tab'];
+    const chatStatus = DOM['17-chat-status'];
+
+    if (!document.getElementById('advanced-controls')) {
+        const advancedControls = document.createElement('div');
+        advancedControls.id = 'advanced-controls';
+        advancedControls.className = 'advanced-only';
+        advancedControls.innerHTML = `
+            <h4>🔬 Advanced AI Controls</h4>
+            <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 1rem; margin-top: 0.5rem;">
+                <div>
+                    <label>Temperature: <span id="temp-value">0.3</span></label>
+                    <input type="range" id="temp-slider" min="0" max="1" step="0.1" value="0.3" oninput="updateParameter('temperature', this.value)">
+                    <small style="color: var(--text-muted);">Creativity level</small>
+                </div>
+                <div>
+                    <label>Max Context: <span id="context-value">16384</span></label>
+                    <input type="range" id="context-slider" min="2048" max="32768" step="2048" value="16384" oninput="updateParameter('context', this.value)">
+                    <small style="color: var(--text-muted);">Memory size</small>
+                </div>
+                <div>
+                    <label>Response Mode:</label>
+                    <select id="response-mode" onchange="updateResponseMode(this.value)">
+                        <option value="standard">Standard</option>
+                        <option value="fast">Fast & Light</option>
+                        <option value="detailed">Detailed & Deep</option>
+                    </select>
+                    <small style="color: var(--text-muted);">Speed vs quality</small>
+                </div>
+            </div>
+            <div style="margin-top: 1rem;">
+                <label>Prompt Strategy:</label>
+                <select id="prompt-strategy" onchange="updatePromptStrategy(this.value)">
+                    <option value="simple">Simple RAG - Direct answers</option>
+                    <option value="enhanced">Enhanced Context - Comprehensive analysis</option>
+                    <option value="analytical">Analytical - Structured reasoning</option>
+                    <option value="creative">Creative - Innovative thinking</option>
+                </select>
+                <small style="color: var(--text-muted);">How the AI approaches your question</small>
+            </div>
+            <div style="margin-top: 1rem; padding: 0.5rem; background: rgba(156, 39, 176, 0.1); border-radius: 4px; border-left: 3px solid var(--advanced-accent, var(--accent-secondary));">
+                <small><strong>Advanced Mode Active:</strong> Enhanced reasoning, configurable parameters, and specialized prompt strategies.</small>
+            </div>
+        `;
+
+        // Insert after the status div
+        chatStatus.insertAdjacentElement('afterend', advancedControls);
+    }
+}
+
+function removeAdvancedPromptControls() {
+    const advancedControls = document.getElementById('advanced-controls');
+    if (advancedControls) {
+        advancedControls.remove();
+    }
+}
+
+// Latest slider values, written to the DOM at most once per animation frame
+const pendingParams = {};
+let paramFrameScheduled = false;
+
+function updateParameter(param, value) {
+    pendingParams[param] = value;
+    if (paramFrameScheduled) return;
+    paramFrameScheduled = true;
+    requestAnimationFrame(() => {
+        for (const [p, v] of Object.entries(pendingParams)) {
+            document.getElementById(`${p === 'temperature' ? 'temp' : 'context'}-value`).textContent = v;
+            delete pendingParams[p];
+        }
+        paramFrameScheduled = false;
+    });
+}
+
+function updatePromptStrategy(strategy) {
+    console.log('Prompt strategy changed to:', strategy);
+    // Visual feedback for strategy change
+    const select = document.getElementById('prompt-strategy');
+    select.style.borderColor = 'var(--advanced-accent, var(--accent-secondary))';
+    setTimeout(() => {
+        select.style.borderColor = '';
+    }, 500);
+}
+
+function updateResponseMode(mode) {
+    console.log('Response mode changed to:', mode);
+    const select = document.getElementById('response-mode');
+
+    // Update UI based on mode
+    if (mode === 'fast') {
+        select.style.background = 'rgba(0, 200, 81, 0.2)';
+        addMessage('🚀 Fast mode enabled - Optimized for speed', 'system');
+    } else if (mode === 'detailed') {
+        select.style.background = 'rgba(156, 39, 176, 0.2)';
+        addMessage('🔬 Detailed mode enabled - Enhanced analysis', 'system');
+    } else {
+        select.style.background = '';
+        addMessage('⚖️ Standard mode enabled - Balanced response', 'system');
+    }
+}
+
+// Load saved mode
+function loadMode() {
+    const savedMode = localStorage.getItem('mode') || 'simple';
+    fetch('/set-mode', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ mode: savedMode })
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            updateModeUI(result.mode);
+        }
+    });
+}
+
+// Load saved theme
+function loadTheme() {
+    const savedTheme = localStorage.getItem('theme');
+    if (savedTheme === 'dark') {
+        document.body.setAttribute('data-theme', 'dark');
+        DOM['10-theme-icon'].textContent = '☀️';
+        DOM['11-theme-text'].textContent = 'Light Mode';
+    }
+}
+
+// Model management functions
+async function checkModelStatus() {
+    try {
+        const response = await fetch('/model-status');
+        const data = await response.json();
+        DOM['available-models'].textContent = data.models.join(', ');
+        DOM['download-status'].textContent = data.download_status;
+    } catch (error) {
+        console.error('Error checking model status:', error);
+    }
+}
+
+async function switchModel() {
+    try {
+        const response = await fetch('/switch-model', {method: 'POST'});
+        const data = await response.json();
+        if (response.ok) {
+            toast('✅ ' + data.message);
+            const modelName = data.new_model.split(' ')[0];
+            const modelParam = data.new_model.split(' ')[1] || '';
+            DOM['6-current-model'].textContent = modelName;
+            DOM['7-model-params'].textContent = modelParam;
+            DOM['model-display'].textContent = data.new_model;
+            DOM['tech-model'].textContent = data.new_model.toLowerCase().replace(' ', ':');
+
+            // Update model tags based on the model
+            updateModelTags(modelName, modelParam);
+        } else {
+            toast('❌ ' + data.error);
+        }
+    } catch (error) {
+        toast(`❌ Error switching model: ${error.message}`);
+    }
+}
+
+// Update model tags based on current model
+function updateModelTags(modelName, modelParam) {
+    const tagsContainer = DOM['8-model-tags'];
+    let tags = [];
+
+    // Define tags for different models
+    if (modelName.toLowerCase().includes('llama')) {
+        if (modelParam === '3B') {
+            tags = ['Better Reasoning', 'Nimble', 'Efficient'];
+        } else if (modelParam === '1B') {
+            tags = ['Fast', 'Lightweight', 'Basic'];
+        }
+    } else if (modelName.toLowerCase().includes('mistral')) {
+        if (modelParam === '7B') {
+            tags = ['Superior Reasoning', 'Versatile', 'Advanced'];
+        }
+    } else if (modelName.toLowerCase().includes('qwen')) {
+        if (modelParam === '72B') {
+            tags = ['Expert Reasoning', 'Comprehensive', 'Enterprise'];
+        }
+    }
+
+    // Update the tags HTML
+    tagsContainer.innerHTML = tags.map(tag =>
+        `<span class="tag">${tag}</span>`
+    ).join('');
+}
+
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', function() {
+    loadTheme();
+    loadMode();
+    checkModelStatus();
+    updateModelTags('Mistral', '7B'); // Initialize with current model
+});
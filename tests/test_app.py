@@ -0,0 +1,121 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+
+import app
+
+
+def test_file_rows_escape_hostile_extension(tmp_path, monkeypatch):
+    (tmp_path / "x.<img src=x onerror=alert(1)>").write_text("hi")
+    monkeypatch.setattr(app, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app._stats_cache, "sig", None)
+
+    rows = app._file_rows_html(app.get_file_stats()["files"])
+
+    assert "<img" not in rows.lower()
+    assert "&lt;IMG SRC=X ONERROR=ALERT(1)&gt;" in rows
+
+
+class _LoopBoundAgent:
+    """Stands in for an agent whose async HTTP client pools connections on the first loop it sees"""
+
+    def __init__(self):
+        self.loop = None
+
+    async def arun(self, message):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        assert loop is self.loop and not loop.is_closed()
+        return message.upper()
+
+
+def test_chat_batch_reuses_one_event_loop(monkeypatch):
+    monkeypatch.setattr(app, "agent", _LoopBoundAgent())
+    client = app.app.test_client()
+
+    for _ in range(2):
+        response = client.post("/chat/batch", json={"messages": ["hi", "there"]})
+        assert response.status_code == 200
+        assert response.get_json() == {"responses": ["HI", "THERE"]}
+
+
+def test_file_stats_cache_hit_skips_listing_and_write_invalidates(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("hello")
+    monkeypatch.setattr(app, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app._stats_cache, "sig", None)
+    first = app.get_file_stats()
+
+    def no_listing(*args):
+        raise AssertionError("cache hit listed the folder")
+
+    with monkeypatch.context() as m:
+        m.setattr(app.os, "scandir", no_listing)
+        m.setattr(app.os, "listdir", no_listing)
+        assert app.get_file_stats() is first
+
+    # A change within the filesystem's mtime granularity, made by this process
+    mtime_ns = os.stat(tmp_path).st_mtime_ns
+    (tmp_path / "b.txt").write_text("bye")
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    assert app.get_file_stats() is first
+    app._note_folder_write()
+    assert app.get_file_stats()["total_files"] == 2
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app.app.config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app._stats_cache, "sig", None)
+    monkeypatch.setattr(app, "_schedule_rebuild", lambda: 7)
+    return tmp_path
+
+
+@pytest.fixture(params=["streaming", "werkzeug"])
+def upload_path(request, monkeypatch):
+    if request.param == "streaming" and app.StreamingFormDataParser is None:
+        pytest.skip("streaming-form-data not installed")
+    if request.param == "werkzeug":
+        monkeypatch.setattr(app, "StreamingFormDataParser", None)
+    return request.param
+
+
+def _post_file(name, data):
+    return app.app.test_client().post(
+        "/upload", data={"file": (io.BytesIO(data), name)}, content_type="multipart/form-data"
+    )
+
+
+def test_upload_writes_the_file_and_schedules_a_rebuild(upload_folder, upload_path):
+    data = b"knowledge\n" * 50000
+
+    response = _post_file("my notes.txt", data)
+
+    assert response.status_code == 202
+    assert response.get_json()["job"] == 7
+    assert sorted(p.name for p in upload_folder.iterdir()) == ["my_notes.txt"]
+    assert (upload_folder / "my_notes.txt").read_bytes() == data
+    assert app.get_file_stats()["total_files"] == 1
+
+
+def test_rejected_uploads_leave_no_temp_files(upload_folder, upload_path):
+    (upload_folder / "taken.txt").write_text("old")
+
+    assert _post_file("taken.txt", b"new").status_code == 400
+    assert _post_file("script.exe", b"MZ").status_code == 400
+    assert sorted(p.name for p in upload_folder.iterdir()) == ["taken.txt"]
+    assert (upload_folder / "taken.txt").read_text() == "old"
+
+
+def test_oversize_upload_is_refused_before_touching_disk(upload_folder, upload_path, monkeypatch):
+    monkeypatch.setitem(app.app.config, "MAX_CONTENT_LENGTH", 1024)
+
+    response = _post_file("big.txt", b"x" * 4096)
+
+    assert response.status_code == 413
+    assert list(upload_folder.iterdir()) == []
@@ -0,0 +1,97 @@
+import asyncio
+import math
+import sqlite3
+import struct
+
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class _CountingEmbedder:
+    """Deterministic stand-in for OllamaEmbeddings that records what it was asked to embed"""
+
+    def __init__(self):
+        self.calls = []
+
+    def _vec(self, text):
+        return [float(len(text)), 1.0, -2.0]
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [self._vec(t) for t in texts]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return self._vec(text)
+
+
+def test_float16_round_trip(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"), "model")
+    exact = [0.0, 1.0, -2.5, 0.125, 65504.0]
+    approx = [0.1, -0.3333, 3.14159]
+    cache.put_many(["exact", "approx"], [exact, approx])
+
+    got_exact, got_approx, missing = cache.get_many(["exact", "approx", "missing"])
+
+    assert got_exact == exact
+    assert all(math.isclose(a, b, rel_tol=1e-3) for a, b in zip(got_approx, approx))
+    assert missing is None
+    blob = sqlite3.connect(str(tmp_path / "emb.sqlite")).execute("SELECT vec FROM emb_f16 LIMIT 1").fetchone()[0]
+    assert len(blob) == 2 * len(exact)
+
+
+def test_keys_are_per_model(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    EmbeddingCache(path, "a").put_many(["text"], [[1.0]])
+
+    assert EmbeddingCache(path, "b").get_many(["text"]) == [None]
+    assert EmbeddingCache(path, "a").get_many(["text"]) == [[1.0]]
+
+
+def test_float32_rows_from_an_old_cache_file_are_not_misread(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    cache = EmbeddingCache(path, "model")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE emb (key BLOB PRIMARY KEY, vec BLOB NOT NULL)")
+    conn.execute("INSERT INTO emb VALUES (?, ?)", (cache._key("text"), struct.pack("<2f", 1.0, 2.0)))
+    conn.commit()
+
+    assert EmbeddingCache(path, "model").get_many(["text"]) == [None]
+
+
+def test_get_many_batches_beyond_the_parameter_limit(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"), "model")
+    texts = [f"t{i}" for i in range(1200)]
+    cache.put_many(texts, [[float(i)] for i in range(1200)])
+
+    assert cache.get_many(texts) == [[float(i)] for i in range(1200)]
+
+
+def test_cached_embeddings_only_embed_misses(tmp_path):
+    embedder = _CountingEmbedder()
+    wrapped = CachedEmbeddings(embedder, EmbeddingCache(str(tmp_path / "emb.sqlite"), "model"))
+
+    first = wrapped.embed_documents(["a", "bb"])
+    second = asyncio.run(wrapped.aembed_documents(["bb", "ccc"]))
+
+    assert embedder.calls == [["a", "bb"], ["ccc"]]
+    assert first == [[1.0, 1.0, -2.0], [2.0, 1.0, -2.0]]
+    assert second == [[2.0, 1.0, -2.0], [3.0, 1.0, -2.0]]
+
+
+def test_cached_embeddings_query_cache_and_normalize(tmp_path):
+    embedder = _CountingEmbedder()
+    wrapped = CachedEmbeddings(embedder, EmbeddingCache(str(tmp_path / "emb.sqlite"), "model"),
+                               normalize=True)
+
+    query = wrapped.embed_query("ab")
+    query.append(99.0)  # callers get a copy
+    assert wrapped.embed_query("ab") == [2 / 3, 1 / 3, -2 / 3]
+    assert embedder.calls == ["ab"]
+
+    (doc,) = wrapped.embed_documents(["ab"])
+    assert math.isclose(math.fsum(x * x for x in doc), 1.0)
+    # The on-disk cache keeps the raw vector
+    assert wrapped.cache.get_many(["ab"]) == [[2.0, 1.0, -2.0]]
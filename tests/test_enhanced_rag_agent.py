@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+enhanced_rag_agent = pytest.importorskip("enhanced_rag_agent")
+DocumentProcessor = enhanced_rag_agent.DocumentProcessor
+
+
+def _reference_chunks(text, chunk_size, overlap):
+    """Token-list chunking as the processor originally did it, joined with single spaces"""
+    tokens = text.split()
+    step = chunk_size - overlap
+    return [" ".join(tokens[i:i + chunk_size]) for i in range(0, max(len(tokens) - overlap, 0), step)]
+
+
+@pytest.mark.parametrize("chunk_size, overlap", [(5, 2), (4, 0), (3, 1), (500, 50)])
+def test_chunk_boundaries_match_token_chunking(chunk_size, overlap):
+    rng = random.Random(chunk_size)
+    text = "".join(rng.choice(["w", "word", "x"]) + rng.choice([" ", "  ", "\n", "\t "])
+                   for _ in range(rng.randint(0, 40)))
+    processor = DocumentProcessor(chunk_size=chunk_size, overlap=overlap)
+
+    chunks = processor.process_document(text)
+
+    assert [" ".join(c.split()) for c in chunks] == _reference_chunks(text, chunk_size, overlap)
+    for chunk in chunks:
+        # Each chunk is a slice of the document, whitespace included
+        assert chunk in text and chunk == chunk.strip()
+
+
+def test_chunks_are_tagged_with_the_document_name():
+    processor = DocumentProcessor(chunk_size=3, overlap=1)
+
+    assert processor.process_document("a b\nc d e", "notes.txt") == ["[notes.txt] a b\nc", "[notes.txt] c d e"]
+    assert processor.process_document("a b\nc d e") == ["a b\nc", "c d e"]
+
+
+def test_short_and_empty_documents():
+    processor = DocumentProcessor(chunk_size=5, overlap=2)
+
+    assert processor.process_document("") == []
+    assert processor.process_document("   \n ") == []
+    assert processor.process_document("one two") == []
+    assert processor.process_document("one two three") == ["one two three"]
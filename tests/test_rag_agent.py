@@ -0,0 +1,109 @@
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+rag_agent = pytest.importorskip("rag_agent")
+from semantic_cache import SmartRAGCache
+
+_WORDS = ["alpha", "beta", "gamma", "delta", "rag", "vector", "cache", "index", "ollama", "pdf"]
+
+
+def _agent(knowledge_base):
+    """SimpleRAGAgent over an in-memory knowledge base, without Ollama or doccydocs"""
+    agent = object.__new__(rag_agent.SimpleRAGAgent)
+    agent.knowledge_base = knowledge_base
+    agent.knowledge_base_size = len(knowledge_base)
+    agent._build_index()
+    return agent
+
+
+def _knowledge_base():
+    rng = random.Random(0)
+    lines = [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 8))) for _ in range(200)]
+    # Lowercasing changes this line's length, which shifts every later offset
+    lines[50] = "İstanbul alpha beta gamma"
+    lines[120] = "Vector cache, index: RAG!"
+    return "\n".join(lines)
+
+
+def _reference_best(knowledge_base, query):
+    """The scoring rule written out line by line: whole-token hits plus a phrase boost"""
+    query_lower = query.lower()
+    tokens = re.findall(r"\w+", query_lower)
+    scored = []
+    for i, line in enumerate(knowledge_base.lower().split("\n")):
+        line_tokens = set(re.findall(r"\w+", line))
+        score = sum(token in line_tokens for token in tokens)
+        if score:
+            if query_lower in line:
+                score += len(query_lower.split())
+            scored.append((i, score))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:4]
+
+
+@pytest.fixture(params=["postings", "jit"])
+def scoring_path(request, monkeypatch):
+    if request.param == "jit" and rag_agent.njit is None:
+        pytest.skip("numba not installed")
+    if request.param == "postings":
+        monkeypatch.setattr(rag_agent, "njit", None)
+    return request.param
+
+
+def test_score_lines_matches_reference(scoring_path):
+    knowledge_base = _knowledge_base()
+    agent = _agent(knowledge_base)
+    rng = random.Random(1)
+    queries = ["vector cache", "RAG", "İstanbul alpha", "nothing here", "alpha alpha"]
+    queries += [" ".join(rng.sample(_WORDS, rng.randint(1, 3))) for _ in range(50)]
+
+    for query in queries:
+        query_lower = query.lower()
+        best = agent._score_lines(query_lower, len(query_lower.split()))
+        assert [(int(i), int(s)) for i, s in best] == _reference_best(knowledge_base, query), query
+
+
+def test_search_knowledge_returns_line_windows_from_offsets(scoring_path):
+    lines = [f"line {i} filler" for i in range(20)]
+    lines[0] = "first needle"
+    lines[19] = "last needle"
+    lines[10] = "İİ middle needle"
+    agent = _agent("\n".join(lines))
+
+    sections = agent.search_knowledge("needle").split("\n\n---\n\n")
+
+    assert sections == ["\n".join(lines[0:4]), "\n".join(lines[7:14]), "\n".join(lines[16:20])]
+
+
+def test_search_knowledge_without_matches():
+    assert _agent("alpha\nbeta").search_knowledge("zeta") == "No relevant information found in knowledge base"
+    assert _agent("").search_knowledge("zeta") == "No knowledge base available"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Hello!!", "Hi there! How can I help you today?"),
+    ("  hi, ", "Hello! How can I help you today?"),
+    ("Good   Morning :)", "Good morning! How can I help you today?"),
+    ("What's your name?", "I'm your AI assistant, here to answer questions about the knowledge base."),
+    ("", "I didn't catch a question there. What would you like to know?"),
+    ("?!", "I didn't catch a question there. What would you like to know?"),
+    ("hi there, what is rag?", None),
+    ("hello world", None),
+])
+def test_trivial_answer(text, expected):
+    assert _agent("").trivial_answer(text) == expected
+
+
+def test_cached_answer_never_embeds():
+    agent = _agent("")
+    agent.llm = SimpleNamespace(model="m")
+    agent.response_cache = SmartRAGCache()
+    agent.embed = lambda text: pytest.fail("cached_answer() embedded the input")
+
+    assert agent.cached_answer("thanks") == "You're welcome."
+    assert agent.cached_answer("What is RAG?") is None
+    agent.response_cache.store("what is rag", "Retrieval-augmented generation.", model="m", mode="chat")
+    assert agent.cached_answer("What is RAG?") == "Retrieval-augmented generation."
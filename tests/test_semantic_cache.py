@@ -0,0 +1,71 @@
+import pytest
+
+semantic_cache = pytest.importorskip("semantic_cache")
+SmartRAGCache = semantic_cache.SmartRAGCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_exact_tier_matches_normalized_query():
+    cache = SmartRAGCache()
+    cache.store("What is RAG?", "answer", model="m", mode="chat")
+
+    assert cache.lookup("  what is   rag ", model="m", mode="chat") == "answer"
+    assert cache.lookup("what is rag", model="other", mode="chat") is None
+    assert cache.lookup("what is rag", model="m", mode="advanced") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_semantic_tier_uses_similarity_threshold():
+    cache = SmartRAGCache(threshold=0.95)
+    cache.store("what is rag", "answer", embedding=[1.0, 0.0], model="m", mode="chat")
+
+    # Scale doesn't matter, only direction
+    assert cache.lookup("explain rag", embedding=[10.0, 0.1], model="m", mode="chat") == "answer"
+    assert cache.lookup("explain rag", embedding=[1.0, 1.0], model="m", mode="chat") is None
+    assert cache.lookup("explain rag", embedding=[1.0, 0.0], model="m", mode="other") is None
+    assert cache.lookup("explain rag", embedding=[1.0, 0.0, 0.0], model="m", mode="chat") is None
+    assert cache.lookup("explain rag", model="m", mode="chat") is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SmartRAGCache(ttl=60)
+    cache.store("what is rag", "answer", embedding=[1.0, 0.0])
+
+    clock[0] += 59
+    assert cache.lookup("what is rag") == "answer"
+    assert cache.lookup("explain rag", embedding=[1.0, 0.0]) == "answer"
+
+    clock[0] += 2
+    assert cache.lookup("explain rag", embedding=[1.0, 0.0]) is None
+    assert cache.lookup("what is rag") is None
+    # The exact-tier miss evicted the expired entry, and the matrix follows
+    assert cache.lookup("explain rag", embedding=[1.0, 0.0]) is None
+    assert len(cache._entries) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SmartRAGCache(max_entries=2)
+    cache.store("a", "A", embedding=[1.0, 0.0])
+    cache.store("b", "B", embedding=[0.0, 1.0])
+    assert cache.lookup("a") == "A"
+    cache.store("c", "C")
+
+    assert cache.lookup("b") is None
+    assert cache.lookup("b again", embedding=[0.0, 1.0]) is None
+    assert cache.lookup("a") == "A"
+    assert cache.lookup("c") == "C"
+
+
+def test_clear_drops_both_tiers():
+    cache = SmartRAGCache()
+    cache.store("a", "A", embedding=[1.0, 0.0])
+    cache.clear()
+
+    assert cache.lookup("a") is None
+    assert cache.lookup("z", embedding=[1.0, 0.0]) is None
@@ -0,0 +1,121 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+smart_rag_agent = pytest.importorskip("smart_rag_agent")
+from langchain_core.documents import Document
+
+
+class _LoopBoundEmbeddings:
+    """Stands in for an embedder whose async HTTP client pools connections on the first loop it sees"""
+
+    def __init__(self):
+        self.loop = None
+        self.embedded = []
+
+    async def aembed_documents(self, texts):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        assert loop is self.loop and not loop.is_closed()
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def _agent():
+    """SmartRAGAgent without Ollama or a vector store; written rows are collected in agent.rows"""
+    agent = object.__new__(smart_rag_agent.SmartRAGAgent)
+    agent.embeddings = _LoopBoundEmbeddings()
+    agent.embed_batch_size = 2
+    agent.vectorstore = None
+    agent.rows = []
+    agent._write_rows = agent.rows.extend
+    agent._write_queue = queue.Queue()
+    agent._flusher_lock = threading.Lock()
+    agent._flusher_thread = None
+    return agent
+
+
+def test_index_chunks_twice_reuses_one_event_loop():
+    agent = _agent()
+
+    agent.index_chunks([Document(page_content=t, metadata={"source": "a/one.txt"}) for t in ("a", "bb", "ccc")])
+    agent.index_chunks([Document(page_content="dddd", metadata={"source": "b/two.txt"})])
+
+    assert agent.embeddings.embedded == ["a", "bb", "ccc", "dddd"]
+    assert [ids for ids, *_ in agent.rows] == [
+        [agent.chunk_id("a"), agent.chunk_id("bb")], [agent.chunk_id("ccc")], [agent.chunk_id("dddd")]
+    ]
+    assert agent.rows[-1][2] == [{"source": "b/two.txt", "basename": "two.txt"}]
+
+
+def test_add_document_reports_outcome_without_waiting_for_more_files():
+    agent = _agent()
+    agent.vectorstore = object()
+    batches = []
+
+    def index_files(paths):
+        batches.append(list(paths))
+        return {p for p in paths if "bad" not in p}
+
+    agent._index_files = index_files
+
+    started = time.monotonic()
+    assert agent.add_document("docs/one.txt") is True
+    assert time.monotonic() - started < 0.25
+    assert agent.add_document("docs/bad.txt") is False
+    assert agent.add_document("docs/notes.docx") is False
+    assert batches == [["docs/one.txt"], ["docs/bad.txt"]]
+
+
+def test_add_document_coalesces_files_queued_during_a_batch():
+    agent = _agent()
+    agent.vectorstore = object()
+    batches = []
+    first_batch_running = threading.Event()
+    release = threading.Event()
+
+    def index_files(paths):
+        batches.append(list(paths))
+        first_batch_running.set()
+        release.wait(5)
+        return set(paths)
+
+    agent._index_files = index_files
+    results = {}
+
+    def add(path):
+        results[path] = agent.add_document(path)
+
+    first = threading.Thread(target=add, args=("a.txt",))
+    first.start()
+    first_batch_running.wait(5)
+    others = [threading.Thread(target=add, args=(p,)) for p in ("b.txt", "c.pdf")]
+    for t in others:
+        t.start()
+    while agent._write_queue.qsize() < 2:
+        time.sleep(0.01)
+    flusher = agent._flusher_thread
+    release.set()
+    for t in [first, flusher] + others:
+        t.join(5)
+
+    assert results == {"a.txt": True, "b.txt": True, "c.pdf": True}
+    assert batches[0] == ["a.txt"] and sorted(batches[1]) == ["b.txt", "c.pdf"]
+    assert agent._flusher_thread is None
+
+
+def test_index_chunks_skips_duplicate_and_already_indexed_chunks(monkeypatch):
+    agent = _agent()
+    monkeypatch.setattr(agent, "_existing_ids", lambda ids: {agent.chunk_id("stored")} & set(ids))
+    docs = [Document(page_content=t, metadata={"source": "kb.txt"})
+            for t in ("boilerplate", "stored", "fresh", "boilerplate")]
+
+    agent.index_chunks(docs)
+
+    assert agent.embeddings.embedded == ["boilerplate", "fresh"]
+    assert [ids for ids, *_ in agent.rows] == [[agent.chunk_id("boilerplate"), agent.chunk_id("fresh")]]
+    assert agent.chunk_id("same text") == agent.chunk_id("same text") != agent.chunk_id("other text")